@@ -0,0 +1,157 @@
+"""
+Sync versus async views under an ASGI server.
+
+Serves the project with uvicorn on a seeded local SQLite database and
+drives each read-heavy page and its async/ variant with concurrent
+GET requests. Reports latency percentiles and throughput of both,
+and the thread hops of one request, counted in process: sync_to_async
+calls outside Django's middleware and the ORM.
+
+    pip install uvicorn
+    python -m benchmarks.async_load --scale 20000 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+
+from benchmarks.http_load import (
+    BASE_DIR,
+    SETTINGS,
+    prepare_database,
+    run_target,
+    setup_django,
+    wait_for_port,
+)
+
+
+PAGES = {
+    "manufacturer-list": None,
+    "car-list": None,
+    "car-list?search": "model=cam",
+    "driver-list": None,
+    "car-detail": None,
+    "driver-detail": None,
+}
+
+# sync_to_async calls every request makes, whatever the view.
+DJANGO_HOPS = (
+    "django.middleware.",
+    "django.contrib.",
+    "django.dispatch.",
+    "django.http.response.",
+    "django.db.models.query.",
+)
+
+
+def targets(user):
+    """Return {label: (sync path, async path)}."""
+    from taxi.tests.query_budget import route_url
+
+    paths = {}
+    for label, query in PAGES.items():
+        name = label.split("?")[0]
+        suffix = f"?{query}" if query else ""
+        paths[label] = (
+            route_url(name, user) + suffix,
+            route_url(f"async-{name}", user) + suffix,
+        )
+    return paths
+
+
+def view_hops(path, cookie):
+    """sync_to_async calls of one request outside Django and the ORM."""
+    from django.test import AsyncClient, override_settings
+
+    from taxi.tests.threads import count_thread_hops
+
+    @override_settings(ALLOWED_HOSTS=["testserver"])
+    async def request():
+        client = AsyncClient()
+        client.cookies["sessionid"] = cookie
+        await client.get(path)  # warm up caches
+        with count_thread_hops() as hops:
+            response = await client.get(path)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path}: {response.status_code}")
+        return sum(
+            count
+            for name, count in hops.items()
+            if not name.startswith(DJANGO_HOPS)
+        )
+
+    return asyncio.run(request())
+
+
+def start_server(port):
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "taxi_service.asgi:application",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": SETTINGS},
+    )
+    wait_for_port(port)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=int, default=10000, help="cars")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    setup_django()
+    user, cookie = prepare_database(args.scale, args.seed)
+    paths = targets(user)
+    hops = {
+        label: [view_hops(path, cookie) for path in pair]
+        for label, pair in paths.items()
+    }
+
+    server = start_server(args.port)
+    try:
+        results = {
+            label: [
+                run_target(
+                    f"http://127.0.0.1:{args.port}{path}",
+                    cookie,
+                    args.requests,
+                    args.concurrency,
+                )
+                for path in pair
+            ]
+            for label, pair in paths.items()
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(
+        f"{'page':<20}{'mode':>6}{'p50 ms':>9}{'p95 ms':>9}{'rps':>9}"
+        f"{'hops':>6}{'errors':>8}"
+    )
+    for label, pair in results.items():
+        for mode, result, hop_count in zip(
+            ("sync", "async"), pair, hops[label]
+        ):
+            print(
+                f"{label:<20}{mode:>6}{result['p50_ms']:>9}"
+                f"{result['p95_ms']:>9}{result['rps']:>9}{hop_count:>6}"
+                f"{result['errors']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
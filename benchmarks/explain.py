@@ -0,0 +1,94 @@
+"""
+Query plans of the indexed hot paths, before and after 0003.
+
+Seeds the benchmark database like http_load, then for each query
+prints EXPLAIN and the median run time with the taxi migrations at
+0002 (indexes made by Django only) and at 0003_car_indexes.
+
+    python -m benchmarks.explain --scale 100000
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.http_load import prepare_database, setup_django
+
+
+MIGRATIONS = {"before": "0002_search_index", "after": "0003_car_indexes"}
+
+
+def hot_queries():
+    """Return {label: queryset}, using the busiest rows as parameters."""
+    from django.db.models import Count
+
+    from taxi.models import Car, Driver, Manufacturer
+
+    manufacturer = (
+        Manufacturer.objects.annotate(cars=Count("car"))
+        .order_by("-cars")
+        .first()
+    )
+    driver = (
+        Driver.objects.annotate(car_count=Count("cars"))
+        .order_by("-car_count")
+        .first()
+    )
+    model = Car.objects.values_list("model", flat=True).first()
+
+    return {
+        "cars by model": Car.objects.filter(model=model).values_list(
+            "id", flat=True
+        ),
+        "manufacturer cars by model": Car.objects.filter(
+            manufacturer=manufacturer
+        )
+        .order_by("model")
+        .values_list("id", "model")[:20],
+        "manufacturer cars of a model": Car.objects.filter(
+            manufacturer=manufacturer, model=model
+        ).values_list("id", flat=True),
+        # As in DriverDetailView.
+        "driver.cars": driver.cars.select_related("manufacturer"),
+    }
+
+
+def timed(queryset, runs):
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        list(queryset.all())
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=int, default=100000, help="cars")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    prepare_database(args.scale, args.seed)
+
+    from django.core.management import call_command
+
+    results = {}
+    for state, migration in MIGRATIONS.items():
+        call_command("migrate", "taxi", migration, verbosity=0)
+        for label, queryset in hot_queries().items():
+            results.setdefault(label, {})[state] = (
+                queryset.explain(),
+                timed(queryset, args.runs),
+            )
+
+    for label, by_state in results.items():
+        print(f"== {label}")
+        for state, (plan, milliseconds) in by_state.items():
+            print(f"-- {state}: {milliseconds:.2f} ms")
+            print(plan)
+        print()
+
+
+if __name__ == "__main__":
+    main()
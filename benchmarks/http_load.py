@@ -0,0 +1,257 @@
+"""
+HTTP load test for the taxi app.
+
+Starts the project on a seeded local SQLite database, drives every
+route in taxi/urls.py plus the search variants of the list pages with
+concurrent GET requests, and reports latency percentiles, throughput
+and SQL queries per request. Results can be saved as a baseline and
+later runs compared against it.
+
+    python -m benchmarks.http_load --scale 20000 --concurrency 8
+    python -m benchmarks.http_load --save-baseline benchmarks/baseline.json
+    python -m benchmarks.http_load --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SETTINGS = "benchmarks.settings"
+
+SEARCHES = {
+    "car-list": "model=cam",
+    "driver-list": "username=driver1",
+    "manufacturer-list": "name=to",
+}
+
+
+def setup_django():
+    os.environ["DJANGO_SETTINGS_MODULE"] = SETTINGS
+    sys.path.insert(0, str(BASE_DIR))
+
+    import django
+
+    django.setup()
+
+
+def prepare_database(scale, seed):
+    """Migrate, seed an empty database and return a session cookie."""
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.test import Client
+
+    from taxi.models import Car
+
+    call_command("migrate", verbosity=0)
+
+    if not Car.objects.exists():
+        call_command(
+            "seed_fleet",
+            manufacturers=max(scale // 1000, 10),
+            drivers=max(scale // 2, 10),
+            cars=scale,
+            drivers_per_car=2,
+            seed=seed,
+        )
+
+    user, _ = get_user_model().objects.get_or_create(
+        username="benchmark",
+        defaults={"license_number": "BEN00000"},
+    )
+    client = Client()
+    client.force_login(user)
+    return user, client.cookies[settings.SESSION_COOKIE_NAME].value
+
+
+def targets(user):
+    """Return {label: path} for every taxi route and search page."""
+    from django.urls import reverse
+
+    from taxi.tests.query_budget import route_names, route_url
+
+    paths = {name: route_url(name, user) for name in route_names()}
+    for name, query in SEARCHES.items():
+        paths[f"{name}?search"] = f"{reverse(f'taxi:{name}')}?{query}"
+    return paths
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"Server did not start on port {port}")
+
+
+def start_server(port):
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "manage.py",
+            "runserver",
+            "--noreload",
+            f"--settings={SETTINGS}",
+            f"127.0.0.1:{port}",
+        ],
+        cwd=BASE_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    wait_for_port(port)
+    return server
+
+
+def fetch(url, cookie):
+    request = urllib.request.Request(
+        url, headers={"Cookie": f"sessionid={cookie}"}
+    )
+    started = time.perf_counter()
+    try:
+        with OPENER.open(request) as response:
+            response.read()
+            status = response.status
+            queries = response.headers.get("X-Query-Count")
+    except urllib.error.HTTPError as error:
+        status = error.code
+        queries = error.headers.get("X-Query-Count")
+    return time.perf_counter() - started, status, int(queries or 0)
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+# Redirects are not followed, toggle-assign would time the detail page.
+OPENER = urllib.request.build_opener(NoRedirect)
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(int(round(percent / 100 * len(ordered))) - 1, 0)
+    return ordered[index]
+
+
+def run_target(url, cookie, requests, concurrency):
+    fetch(url, cookie)  # warm up caches
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        samples = list(
+            pool.map(lambda _: fetch(url, cookie), range(requests))
+        )
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency * 1000 for latency, _, _ in samples]
+    return {
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "rps": round(requests / elapsed, 1),
+        "queries": round(statistics.mean(q for _, _, q in samples), 1),
+        "errors": sum(1 for _, status, _ in samples if status >= 500),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions against a baseline run."""
+    regressions = []
+    for label, result in results.items():
+        before = baseline.get(label)
+        if not before:
+            continue
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{label}: p95 {before['p95_ms']} -> {result['p95_ms']} ms"
+            )
+        if result["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(
+                f"{label}: throughput {before['rps']} -> "
+                f"{result['rps']} rps"
+            )
+        if result["queries"] > before["queries"]:
+            regressions.append(
+                f"{label}: queries {before['queries']} -> "
+                f"{result['queries']}"
+            )
+        if result["errors"]:
+            regressions.append(f"{label}: {result['errors']} server errors")
+    return regressions
+
+
+def print_report(results):
+    print(
+        f"{'route':<26}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'rps':>9}{'queries':>9}{'errors':>8}"
+    )
+    for label, result in results.items():
+        print(
+            f"{label:<26}{result['p50_ms']:>9}{result['p95_ms']:>9}"
+            f"{result['p99_ms']:>9}{result['rps']:>9}"
+            f"{result['queries']:>9}{result['errors']:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=int, default=10000, help="cars")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--routes", nargs="*", help="only these labels")
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    setup_django()
+    user, cookie = prepare_database(args.scale, args.seed)
+    paths = targets(user)
+    if args.routes:
+        paths = {label: paths[label] for label in args.routes}
+
+    server = start_server(args.port)
+    try:
+        results = {
+            label: run_target(
+                f"http://127.0.0.1:{args.port}{path}",
+                cookie,
+                args.requests,
+                args.concurrency,
+            )
+            for label, path in paths.items()
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+    print_report(results)
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.baseline:
+        regressions = compare(
+            results, json.loads(args.baseline.read_text()), args.tolerance
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+from contextlib import contextmanager
+
+from taxi.middleware import TaxiMiddleware, observe_queries
+
+
+class QueryCountMiddleware(TaxiMiddleware):
+    """Report the number of SQL queries of a request in X-Query-Count."""
+
+    @contextmanager
+    def around(self, request):
+        queries = []
+        with observe_queries(lambda sql, duration: queries.append(sql)):
+            yield queries
+
+    def finish(self, request, response, queries):
+        response["X-Query-Count"] = str(len(queries))
+        return response
@@ -0,0 +1,25 @@
+"""Settings for running the taxi app under the benchmark suite."""
+import os
+
+from taxi_service.settings import *  # noqa: F403
+from taxi_service.settings import BASE_DIR, INSTALLED_APPS, MIDDLEWARE
+
+
+DEBUG = False
+
+ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != "debug_toolbar"]
+
+MIDDLEWARE = ["benchmarks.middleware.QueryCountMiddleware"] + [
+    name for name in MIDDLEWARE if not name.startswith("debug_toolbar")
+]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get(
+            "BENCH_DATABASE", BASE_DIR / "benchmarks" / "bench.sqlite3"
+        ),
+    }
+}
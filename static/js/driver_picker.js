@@ -0,0 +1,79 @@
+// Search-as-you-type picker for checkboxes rendered by DriverLookupWidget.
+// The container only holds the chosen drivers, one checkbox each, so
+// unchecking one leaves the others alone. Matches are fetched page by
+// page from the lookup endpoint and added as checked checkboxes on click.
+document.querySelectorAll("div[data-lookup-url]").forEach(function (picker) {
+  const search = document.createElement("input");
+  search.type = "search";
+  search.className = "form-control mb-2";
+  search.placeholder = "Search drivers by username...";
+
+  const results = document.createElement("div");
+  results.className = "list-group mb-2";
+
+  const more = document.createElement("button");
+  more.type = "button";
+  more.className = "btn btn-link";
+  more.textContent = "More";
+  more.hidden = true;
+
+  picker.before(search, results, more);
+
+  let next = null;
+  let timer = null;
+
+  function addCheckbox(driver) {
+    const existing = picker.querySelector(`input[value="${driver.id}"]`);
+    if (existing) {
+      existing.checked = true;
+      return;
+    }
+
+    const checkbox = document.createElement("input");
+    checkbox.type = "checkbox";
+    checkbox.name = picker.dataset.name;
+    checkbox.value = driver.id;
+    checkbox.checked = true;
+
+    const label = document.createElement("label");
+    label.append(checkbox, " ", driver.text);
+
+    const item = document.createElement("div");
+    item.className = "form-check";
+    item.append(label);
+    picker.append(item);
+  }
+
+  function load(cursor) {
+    const url = new URL(picker.dataset.lookupUrl, window.location.origin);
+    url.searchParams.set("q", search.value);
+    if (cursor) {
+      url.searchParams.set("cursor", cursor);
+    }
+
+    fetch(url, {credentials: "same-origin"})
+      .then(function (response) { return response.json(); })
+      .then(function (data) {
+        if (!cursor) {
+          results.replaceChildren();
+        }
+        data.results.forEach(function (driver) {
+          const item = document.createElement("button");
+          item.type = "button";
+          item.className = "list-group-item list-group-item-action";
+          item.textContent = driver.text;
+          item.addEventListener("click", function () { addCheckbox(driver); });
+          results.append(item);
+        });
+        next = data.next;
+        more.hidden = !next;
+      });
+  }
+
+  search.addEventListener("input", function () {
+    clearTimeout(timer);
+    timer = setTimeout(function () { load(null); }, 250);
+  });
+
+  more.addEventListener("click", function () { load(next); });
+});
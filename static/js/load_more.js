@@ -0,0 +1,14 @@
+// "Load more" buttons rendered by includes/load_more.html. The button's
+// list item is replaced with the next page of items from its URL, which
+// ends with the following button while more pages are left.
+document.addEventListener("click", function (event) {
+  const button = event.target.closest("button[data-load-more]");
+  if (!button) {
+    return;
+  }
+  button.disabled = true;
+
+  fetch(button.dataset.loadMore, {credentials: "same-origin"})
+    .then(function (response) { return response.text(); })
+    .then(function (html) { button.closest("li").outerHTML = html; });
+});
@@ -0,0 +1,205 @@
+"""
+Read-only JSON API over cars, drivers and manufacturers.
+
+Clients pick the fields they need with `?fields=`, e.g.
+`?fields=id,model,manufacturer.name,drivers.username`. Only the
+selected columns are loaded, foreign keys are joined with
+`select_related` and many-to-many relations are prefetched only when
+a field of theirs is requested. Lists are keyset paginated with
+`?cursor=` tokens. ETag and Last-Modified come from the versions of
+the tables a resource reads, so unchanged responses are answered with
+304 Not Modified without querying them.
+"""
+from django.contrib.auth.decorators import login_required
+from django.db.models import Prefetch
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from .conditional import conditional
+from .models import Car, Driver, Manufacturer
+from .pagination import paginate_by_cursor
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+class Resource:
+    """
+    Fields exposed for one model.
+
+    `columns` are plain model fields. `relations` maps a relation name
+    to (resource name, many), nested fields of a relation are limited
+    to the columns of that resource. `tables` are the table versions
+    the resource and its relations read.
+    """
+
+    def __init__(
+        self, model, columns, tables, relations=None, default=None
+    ):
+        self.model = model
+        self.columns = columns
+        self.tables = tables
+        self.relations = relations or {}
+        self.default = default or columns
+
+    def parse_fields(self, value):
+        """
+        Split `?fields=` into (columns, {relation: nested columns}).
+        A bare relation name selects all columns of the related resource.
+        """
+        names = value.split(",") if value else self.default
+        columns = ["id"]
+        nested = {}
+
+        for name in filter(None, (name.strip() for name in names)):
+            relation, _, field = name.partition(".")
+            if relation in self.relations:
+                target = RESOURCES[self.relations[relation][0]]
+                fields = nested.setdefault(relation, ["id"])
+                for column in [field] if field else target.columns:
+                    if column not in target.columns:
+                        raise InvalidFields(f"Unknown field {name}")
+                    if column not in fields:
+                        fields.append(column)
+            elif field or name not in self.columns:
+                raise InvalidFields(f"Unknown field {name}")
+            elif name not in columns:
+                columns.append(name)
+
+        return columns, nested
+
+    def get_queryset(self, columns, nested):
+        """Load only the selected columns and relations."""
+        only = list(columns)
+        queryset = self.model.objects.all()
+
+        for relation, fields in nested.items():
+            resource_name, many = self.relations[relation]
+            if many:
+                queryset = queryset.prefetch_related(
+                    Prefetch(
+                        relation,
+                        queryset=RESOURCES[
+                            resource_name
+                        ].model.objects.only(*fields),
+                    )
+                )
+            else:
+                queryset = queryset.select_related(relation)
+                only.extend(f"{relation}__{field}" for field in fields)
+
+        return queryset.only(*only)
+
+    def serialize(self, obj, columns, nested):
+        data = {column: getattr(obj, column) for column in columns}
+
+        for relation, fields in nested.items():
+            if self.relations[relation][1]:
+                data[relation] = [
+                    {field: getattr(item, field) for field in fields}
+                    for item in getattr(obj, relation).all()
+                ]
+            else:
+                related = getattr(obj, relation)
+                data[relation] = {
+                    field: getattr(related, field) for field in fields
+                }
+
+        return data
+
+
+RESOURCES = {
+    "manufacturers": Resource(
+        Manufacturer, ["id", "name", "country"], ["manufacturers"]
+    ),
+    "cars": Resource(
+        Car,
+        ["id", "model"],
+        ["cars", "manufacturers", "drivers", "assignments"],
+        relations={
+            "manufacturer": ("manufacturers", False),
+            "drivers": ("drivers", True),
+        },
+        default=["id", "model", "manufacturer"],
+    ),
+    "drivers": Resource(
+        Driver,
+        ["id", "username", "first_name", "last_name", "license_number"],
+        ["drivers", "cars", "assignments"],
+        relations={"cars": ("cars", True)},
+    ),
+}
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        size = DEFAULT_PAGE_SIZE
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def api_view(view):
+    """
+    Login required, GET and HEAD only, conditional on the resource
+    tables, bad fields give 400.
+    """
+
+    def respond(request, resource, **kwargs):
+        try:
+            return view(request, RESOURCES[resource], **kwargs)
+        except InvalidFields as error:
+            return JsonResponse({"error": str(error)}, status=400)
+
+    wrapper = require_safe(
+        login_required(
+            conditional(
+                respond,
+                lambda request, resource, **kwargs: (
+                    RESOURCES[resource].tables
+                ),
+            )
+        )
+    )
+    wrapper.__name__ = view.__name__
+    wrapper.__doc__ = view.__doc__
+    return wrapper
+
+
+def compact_json(data):
+    return JsonResponse(data, json_dumps_params={"separators": (",", ":")})
+
+
+@api_view
+def resource_list(request, resource):
+    """A page of objects ordered by id."""
+    columns, nested = resource.parse_fields(request.GET.get("fields"))
+    page = paginate_by_cursor(
+        resource.get_queryset(columns, nested),
+        ("id",),
+        page_size(request),
+        request.GET.get("cursor"),
+    )
+    return compact_json(
+        {
+            "results": [
+                resource.serialize(obj, columns, nested) for obj in page
+            ],
+            "next": page.next_cursor,
+            "previous": page.previous_cursor,
+        },
+    )
+
+
+@api_view
+def resource_detail(request, resource, pk):
+    """A single object."""
+    columns, nested = resource.parse_fields(request.GET.get("fields"))
+    obj = get_object_or_404(resource.get_queryset(columns, nested), pk=pk)
+    return compact_json(resource.serialize(obj, columns, nested))
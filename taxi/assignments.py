@@ -0,0 +1,188 @@
+from django.db import IntegrityError, router, transaction
+from django.db.models.signals import m2m_changed
+
+from .models import Car, Driver
+from .seed import batched
+
+
+Assignment = Car.drivers.through
+
+
+def send_m2m_changed(car, action, driver_ids, using):
+    """
+    Send the m2m_changed signal `car.drivers.add/remove` would send,
+    for changes written straight to the through table.
+    """
+    m2m_changed.send(
+        sender=Assignment,
+        instance=car,
+        action=action,
+        reverse=False,
+        model=Driver,
+        pk_set=set(driver_ids),
+        using=using,
+    )
+
+
+def insert_assignments(pairs, using, batch_size=None):
+    """
+    Insert (car_id, driver_id) pairs and return the pairs inserted.
+
+    Runs in a savepoint of the caller's transaction. Should another
+    transaction have inserted some of the pairs first, they are read
+    back and left out, so signals are only sent for rows written here.
+    """
+    pairs = set(pairs)
+    while pairs:
+        try:
+            with transaction.atomic(using=using):
+                Assignment.objects.using(using).bulk_create(
+                    [
+                        Assignment(car_id=car_id, driver_id=driver_id)
+                        for car_id, driver_id in pairs
+                    ],
+                    batch_size=batch_size,
+                )
+            return pairs
+        except IntegrityError:
+            taken = set(
+                Assignment.objects.using(using)
+                .filter(
+                    car_id__in={car_id for car_id, _ in pairs},
+                    driver_id__in={driver_id for _, driver_id in pairs},
+                )
+                .values_list("car_id", "driver_id")
+            )
+            if not pairs & taken:
+                raise
+            pairs -= taken
+    return pairs
+
+
+def toggle_assignment(car, driver_id):
+    """
+    Unassign the driver from the car if assigned, otherwise assign.
+
+    Runs one DELETE and, when nothing was deleted, one INSERT inside
+    a transaction. Should a concurrent toggle insert the same row
+    first, the driver stays assigned and no signal is sent for it.
+    Returns True when the driver ends up assigned.
+    """
+    using = router.db_for_write(Assignment)
+    assignments = Assignment.objects.using(using)
+
+    with transaction.atomic(using=using):
+        deleted, _ = assignments.filter(
+            car_id=car.pk, driver_id=driver_id
+        ).delete()
+
+        if deleted:
+            send_m2m_changed(car, "post_remove", {driver_id}, using)
+            return False
+
+        if insert_assignments({(car.pk, driver_id)}, using):
+            send_m2m_changed(car, "post_add", {driver_id}, using)
+        return True
+
+
+OPERATIONS = ("add", "remove")
+
+
+def is_id(value):
+    # JSON true and false are ints to isinstance.
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_operation(operation):
+    """Return (op, car_id, driver_id) or None for a malformed item."""
+    if not isinstance(operation, dict):
+        return None
+    op, car_id, driver_id = (
+        operation.get("op"),
+        operation.get("car"),
+        operation.get("driver"),
+    )
+    if (
+        op not in OPERATIONS
+        or not is_id(car_id)
+        or not is_id(driver_id)
+    ):
+        return None
+    return op, car_id, driver_id
+
+
+def apply_operations(operations, batch_size=500):
+    """
+    Apply many {"op": "add"|"remove", "car": id, "driver": id} items.
+
+    Cars, drivers and existing assignments are checked with one query
+    each, the operations are replayed in order against the existing
+    assignments, and only the net difference is written with one bulk
+    insert and batched deletes inside one transaction. Returns one
+    {"status": ..., "error": ...} result per item, where status is
+    "added", "removed", "unchanged" or "error".
+    """
+    parsed = [parse_operation(operation) for operation in operations]
+    valid = [item for item in parsed if item]
+    car_ids = {car_id for _, car_id, _ in valid}
+    driver_ids = {driver_id for _, _, driver_id in valid}
+    using = router.db_for_write(Assignment)
+
+    with transaction.atomic(using=using):
+        known_cars = set(
+            Car.objects.using(using)
+            .filter(pk__in=car_ids)
+            .values_list("pk", flat=True)
+        )
+        known_drivers = set(
+            Driver.objects.using(using)
+            .filter(pk__in=driver_ids)
+            .values_list("pk", flat=True)
+        )
+        existing = {
+            (car_id, driver_id): pk
+            for pk, car_id, driver_id in Assignment.objects.using(using)
+            .filter(car_id__in=known_cars, driver_id__in=known_drivers)
+            .values_list("pk", "car_id", "driver_id")
+        }
+
+        assigned = set(existing)
+        results = []
+        for item in parsed:
+            if item is None:
+                results.append({"status": "error", "error": "invalid item"})
+                continue
+
+            op, car_id, driver_id = item
+            pair = (car_id, driver_id)
+            if car_id not in known_cars:
+                results.append({"status": "error", "error": "unknown car"})
+            elif driver_id not in known_drivers:
+                results.append(
+                    {"status": "error", "error": "unknown driver"}
+                )
+            elif op == "add" and pair not in assigned:
+                assigned.add(pair)
+                results.append({"status": "added"})
+            elif op == "remove" and pair in assigned:
+                assigned.remove(pair)
+                results.append({"status": "removed"})
+            else:
+                results.append({"status": "unchanged"})
+
+        added = insert_assignments(
+            assigned - set(existing), using, batch_size
+        )
+        removed = set(existing) - assigned
+
+        for pks in batched((existing[pair] for pair in removed), batch_size):
+            Assignment.objects.using(using).filter(pk__in=pks).delete()
+
+        for action, pairs in (("post_add", added), ("post_remove", removed)):
+            by_car = {}
+            for car_id, driver_id in pairs:
+                by_car.setdefault(car_id, set()).add(driver_id)
+            for car_id, drivers in by_car.items():
+                send_m2m_changed(Car(pk=car_id), action, drivers, using)
+
+    return results
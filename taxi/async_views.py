@@ -0,0 +1,168 @@
+"""
+Async variants of the read-heavy list and detail views, under async/.
+
+Under ASGI they do not hold a thread for the whole request: they read
+through the async ORM (acount, aget, async iteration) and load the
+user with request.auser(). Pages render the templates of taxi.views,
+so everything a template shows is loaded before rendering, templates
+must not query in async code.
+
+The async ORM still runs each query with sync_to_async on a worker
+thread, and so do the process_request and process_response hooks of
+Django's own middleware. The taxi middleware runs async (see
+taxi.middleware). Cache reads stay synchronous: the cache backends
+offer no native async API, their async methods are sync_to_async too.
+"""
+from functools import wraps
+
+from django.contrib.auth.views import redirect_to_login
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.shortcuts import aget_object_or_404, render
+from django.views.decorators.http import require_safe
+
+from .conditional import conditional
+from .fragments import fragment_context
+from .models import Car, Driver, Manufacturer
+from .pagination import apaginate, apaginate_by_cursor
+from .search import get_search_backend
+from .views import (
+    CAR_DRIVERS_PAGE_SIZE,
+    DRIVER_CARS_PAGE_SIZE,
+    car_detail_queryset,
+    car_drivers_queryset,
+    driver_cars_queryset,
+)
+
+
+PAGE_SIZE = 5
+
+
+def async_page(get_names, login=False):
+    """
+    Decorate an async page: load request.user, redirect anonymous
+    users if `login`, and answer conditional GETs like
+    ConditionalGetMixin, from the versions named by
+    `get_names(request, *args, **kwargs)`.
+    """
+
+    def decorator(view):
+        conditional_view = conditional(view, get_names)
+
+        @require_safe
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            # Neither the view nor the auth context processor may load
+            # the lazy request.user synchronously.
+            request.user = await request.auser()
+            if login and not request.user.is_authenticated:
+                return redirect_to_login(request.get_full_path())
+            return await conditional_view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def fragment_cached(name, *vary_on):
+    return cache.get(make_template_fragment_key(name, vary_on)) is not None
+
+
+async def render_list(request, queryset, field, template_name, name):
+    """Render a page of queryset, searched by `field`, like ListView."""
+    term = request.GET.get(field, "")
+    if term:
+        queryset = get_search_backend().filter(queryset, field, term)
+
+    page = await apaginate(queryset, PAGE_SIZE, request.GET.get("page"))
+    query = request.GET.copy()
+    query.pop("page", None)
+
+    return render(
+        request,
+        template_name,
+        {
+            name: page.object_list,
+            "object_list": page.object_list,
+            "paginator": page.paginator,
+            "page_obj": page,
+            "is_paginated": page.has_other_pages(),
+            "page_query": f"{query.urlencode()}&" if query else "",
+            "search_query": term,
+        },
+    )
+
+
+@async_page(lambda request: ["manufacturers"])
+async def manufacturer_list(request):
+    return await render_list(
+        request,
+        Manufacturer.objects.all(),
+        "name",
+        "taxi/manufacturer_list.html",
+        "manufacturer_list",
+    )
+
+
+@async_page(lambda request: ["cars", "manufacturers"])
+async def car_list(request):
+    return await render_list(
+        request,
+        Car.objects.select_related("manufacturer").order_by("id"),
+        "model",
+        "taxi/car_list.html",
+        "car_list",
+    )
+
+
+@async_page(lambda request: ["drivers"], login=True)
+async def driver_list(request):
+    return await render_list(
+        request,
+        Driver.objects.order_by("id"),
+        "username",
+        "taxi/driver_list.html",
+        "driver_list",
+    )
+
+
+@async_page(lambda request, pk: [f"car:{pk}", "manufacturers"])
+async def car_detail(request, pk):
+    car = await aget_object_or_404(car_detail_queryset(request.user.pk), pk=pk)
+    context = {"car": car, "object": car, **fragment_context(f"car:{pk}")}
+
+    if fragment_cached("car_drivers", car.pk, context["fragment_version"]):
+        # Should the fragment expire before the template reads it, the
+        # page without drivers is not cached in its place.
+        context["fragment_timeout"] = 0
+    else:
+        context["drivers"] = await apaginate_by_cursor(
+            car_drivers_queryset(car), ("id",), CAR_DRIVERS_PAGE_SIZE
+        )
+        context["driver_count"] = await Car.drivers.through.objects.filter(
+            car_id=car.pk
+        ).acount()
+
+    return render(request, "taxi/car_detail.html", context)
+
+
+@async_page(lambda request, pk: [f"driver:{pk}", "manufacturers"])
+async def driver_detail(request, pk):
+    driver = await aget_object_or_404(Driver, pk=pk)
+    context = {
+        "driver": driver,
+        "object": driver,
+        **fragment_context(f"driver:{pk}", "manufacturers"),
+    }
+
+    if fragment_cached("driver_cars", driver.pk, context["fragment_version"]):
+        context["fragment_timeout"] = 0
+    else:
+        context["cars"] = await apaginate_by_cursor(
+            driver_cars_queryset(driver), ("id",), DRIVER_CARS_PAGE_SIZE
+        )
+        context["car_count"] = await Car.drivers.through.objects.filter(
+            driver_id=driver.pk
+        ).acount()
+
+    return render(request, "taxi/driver_detail.html", context)
@@ -0,0 +1,111 @@
+"""
+Conditional GET from the versions in taxi.versions.
+
+The ETag and Last-Modified of a page are derived from the versions of
+the tables or objects it shows, so a request carrying If-None-Match
+or If-Modified-Since is answered with 304 Not Modified after a few
+cache reads, before the view runs its queries. Versions start from
+the clock when first read after a bump, which makes the newest of
+them an upper bound of the last change, usable as Last-Modified.
+"""
+import hashlib
+import math
+import time
+from datetime import datetime, timezone
+
+from asgiref.sync import iscoroutinefunction
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .versions import get_versions
+
+
+def request_versions(request, names):
+    """
+    Versions of names plus the logged in driver, whose username is
+    shown on every page.
+    """
+    if request.user.is_authenticated:
+        names = [*names, f"driver:{request.user.pk}"]
+    return get_versions(*names)
+
+
+def version_etag(request, versions):
+    """ETag of the versions as seen by the requesting user."""
+    token = "-".join(str(version) for version in versions)
+    digest = hashlib.md5(f"{request.user.pk}:{token}".encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def version_last_modified(versions):
+    """
+    Newest version rounded up to the whole seconds of HTTP dates, or
+    None until that second is over: a change made within it would get
+    the same Last-Modified and be answered 304 to If-Modified-Since.
+    """
+    seconds = math.ceil(max(versions) / 1e6)
+    if seconds > time.time():
+        return None
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+def conditional(view, get_names):
+    """
+    Wrap view with Django's `condition`, versions are read once per
+    request from `get_names(request, *args, **kwargs)`. Async views
+    give an async wrapper, request.user must then be loaded already.
+    """
+
+    def with_condition(request, *args, **kwargs):
+        versions = request_versions(
+            request, get_names(request, *args, **kwargs)
+        )
+        return condition(
+            etag_func=lambda *args, **kwargs: version_etag(
+                request, versions
+            ),
+            last_modified_func=lambda *args, **kwargs: (
+                version_last_modified(versions)
+            ),
+        )(view)
+
+    # Pages differ per user and must be revalidated on every use.
+    if iscoroutinefunction(view):
+
+        async def wrapper(request, *args, **kwargs):
+            response = await with_condition(request, *args, **kwargs)(
+                request, *args, **kwargs
+            )
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+    else:
+
+        def wrapper(request, *args, **kwargs):
+            response = with_condition(request, *args, **kwargs)(
+                request, *args, **kwargs
+            )
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+    return wrapper
+
+
+class ConditionalGetMixin:
+    """
+    Answer conditional GET requests of a list or detail view with 304
+    while none of the versions named by `get_version_names` changed.
+    Put it after LoginRequiredMixin, so anonymous users are redirected
+    first.
+    """
+
+    version_names = ()
+
+    def get_version_names(self):
+        return list(self.version_names)
+
+    def dispatch(self, request, *args, **kwargs):
+        return conditional(
+            super().dispatch,
+            lambda *args, **kwargs: self.get_version_names(),
+        )(request, *args, **kwargs)
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Car, Driver, Manufacturer
+from .routing import read_from_primary
+from .versions import recently_bumped
+
+
+KEY_PREFIX = "taxi:count:"
+
+COUNTED = {
+    "drivers": Driver,
+    "cars": Car,
+    "manufacturers": Manufacturer,
+    "assignments": Car.drivers.through,
+}
+
+
+def counter_timeout():
+    """
+    Seconds a cached count lives before it is recounted.
+
+    Signals only reach the cache of the process that wrote, so with
+    a per-process cache this bounds how stale other workers can get.
+    """
+    return getattr(settings, "TAXI_COUNTER_TIMEOUT", 300)
+
+
+def get_counts(*names):
+    """
+    Return {name: count}, counting only names missing from the cache.
+    Recounts of tables changed within the replicas' lag are read from
+    the primary, they are cached for counter_timeout().
+    """
+    keys = {name: KEY_PREFIX + name for name in names}
+    cached = cache.get_many(keys.values())
+    counts = {}
+    missing = {}
+
+    stale = [name for name, key in keys.items() if key not in cached]
+    if stale and recently_bumped(*stale):
+        read_from_primary()
+
+    for name, key in keys.items():
+        if key in cached:
+            counts[name] = cached[key]
+        else:
+            counts[name] = missing[key] = COUNTED[name].objects.count()
+
+    if missing:
+        cache.set_many(missing, counter_timeout())
+
+    return counts
+
+
+def adjust(name, delta):
+    """Shift a cached count by delta once the current transaction commits."""
+
+    def apply():
+        try:
+            cache.incr(KEY_PREFIX + name, delta)
+        except ValueError:
+            pass  # not cached, the next read counts from the database
+
+    transaction.on_commit(apply)
+
+
+def invalidate(name):
+    """Drop a cached count so the next read recounts it."""
+    transaction.on_commit(lambda: cache.delete(KEY_PREFIX + name))
+
+
+def reconcile():
+    """Recount every counter from the database and return the counts."""
+    counts = {name: model.objects.count() for name, model in COUNTED.items()}
+    cache.set_many(
+        {KEY_PREFIX + name: count for name, count in counts.items()},
+        counter_timeout(),
+    )
+    return counts
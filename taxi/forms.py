@@ -2,14 +2,66 @@ from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
 from django.core.exceptions import ValidationError
+from django.urls import reverse_lazy
 
 from taxi.models import Car, Driver
 
 
+class DriverLookupWidget(forms.SelectMultiple):
+    """
+    Checkboxes for the selected drivers only.
+
+    Every chosen driver is its own checked checkbox, so unchecking one
+    never deselects the others. Other drivers are found with
+    search-as-you-type against the driver lookup endpoint and added as
+    checked checkboxes, see static/js/driver_picker.js.
+    """
+
+    template_name = "taxi/widgets/driver_lookup.html"
+    option_template_name = "django/forms/widgets/checkbox_option.html"
+    input_type = "checkbox"
+    checked_attribute = {"checked": True}
+    add_id_index = True
+
+    class Media:
+        js = ("js/driver_picker.js",)
+
+    def __init__(self, attrs=None):
+        super().__init__(attrs)
+        self.lookup_url = reverse_lazy("taxi:driver-lookup")
+
+    def use_required_attribute(self, initial):
+        # A required checkbox would have to be checked.
+        return False
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["widget"]["lookup_url"] = self.lookup_url
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        selected = [pk for pk in value if pk.isdigit()]
+        self.choices = (
+            [
+                choices.choice(obj)
+                for obj in choices.queryset.filter(pk__in=selected)
+            ]
+            if selected
+            else []
+        )
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
+
+
 class CarForm(forms.ModelForm):
     drivers = forms.ModelMultipleChoiceField(
-        queryset=get_user_model().objects.all(),
-        widget=forms.CheckboxSelectMultiple,
+        queryset=get_user_model().objects.only(
+            "id", "username", "first_name", "last_name"
+        ),
+        widget=DriverLookupWidget,
     )
 
     class Meta:
@@ -0,0 +1,30 @@
+from django.conf import settings
+
+from .versions import version_token
+
+
+def fragment_context(*names):
+    """`fragment_version` of the versions names and `fragment_timeout`."""
+    return {
+        "fragment_version": version_token(*names),
+        "fragment_timeout": getattr(settings, "TAXI_FRAGMENT_TIMEOUT", 600),
+    }
+
+
+class FragmentCacheMixin:
+    """
+    Provide `fragment_version` and `fragment_timeout` for `{% cache %}`
+    blocks of a detail template.
+
+    The version combines the versions named by `get_fragment_versions`,
+    which taxi.signals bumps whenever the object or the related rows
+    shown in the fragment change.
+    """
+
+    def get_fragment_versions(self):
+        return []
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(fragment_context(*self.get_fragment_versions()))
+        return context
@@ -0,0 +1,150 @@
+"""
+Lightweight per-request performance report.
+
+For a share TAXI_INSTRUMENTATION_SAMPLE_RATE (0 to 1) of requests,
+InstrumentationMiddleware records the wall time, the number and time
+of SQL queries on every database alias, the render time of a
+TemplateResponse and the queries run more than once with the same
+fingerprint, the usual sign of an N+1. The report is logged as one
+JSON line on the "taxi.instrumentation" logger and, unless
+TAXI_SERVER_TIMING is False, sent in a Server-Timing header.
+
+Requests that are not sampled only pay for one random number. Views
+rendering with `render()` instead of a TemplateResponse report no
+template time, their rendering is part of the view time, and queries
+run while a streaming response is consumed are not counted.
+"""
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+
+from .middleware import TaxiMiddleware, observe_queries
+
+
+logger = logging.getLogger(__name__)
+
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+VALUE_LIST = re.compile(r"\((?:\s*\?\s*,)*\s*\?\s*\)")
+SPACE = re.compile(r"\s+")
+
+REPORTED_DUPLICATES = 5
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """
+    Shape of a query: literals, placeholders and the length of value
+    lists are replaced, so one query run with other parameters, as in
+    a loop, gets the same fingerprint. The ORM sends the same SQL with
+    placeholders again and again, hence the cache.
+    """
+    sql = STRING.sub("?", sql)
+    sql = NUMBER.sub("?", sql.replace("%s", "?"))
+    sql = VALUE_LIST.sub("(...)", sql)
+    return SPACE.sub(" ", sql).strip()
+
+
+def sample_rate():
+    return getattr(settings, "TAXI_INSTRUMENTATION_SAMPLE_RATE", 0)
+
+
+class RequestStats:
+    """Query observer counting and timing the queries of a request."""
+
+    def __init__(self):
+        self.fingerprints = Counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = None
+        self.total_time = 0.0
+
+    def __call__(self, sql, duration):
+        self.sql_time += duration
+        self.sql_count += 1
+        self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return {
+            sql: count
+            for sql, count in self.fingerprints.most_common(
+                REPORTED_DUPLICATES
+            )
+            if count > 1
+        }
+
+    def as_dict(self, request, response):
+        match = request.resolver_match
+        return {
+            "view": match.view_name if match else None,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(self.total_time * 1000, 2),
+            "sql_count": self.sql_count,
+            "sql_ms": round(self.sql_time * 1000, 2),
+            "template_ms": (
+                None
+                if self.template_time is None
+                else round(self.template_time * 1000, 2)
+            ),
+            "duplicates": self.duplicates(),
+        }
+
+    def server_timing(self):
+        timings = [
+            f"total;dur={self.total_time * 1000:.2f}",
+            f'db;dur={self.sql_time * 1000:.2f};desc="{self.sql_count} '
+            'queries"',
+        ]
+        if self.template_time is not None:
+            timings.append(f"tpl;dur={self.template_time * 1000:.2f}")
+        return ", ".join(timings)
+
+
+class InstrumentationMiddleware(TaxiMiddleware):
+    """Put first in MIDDLEWARE, so the report covers the whole stack."""
+
+    @contextmanager
+    def around(self, request):
+        if random.random() >= sample_rate():
+            yield None
+            return
+
+        stats = request.instrumentation = RequestStats()
+        started = time.perf_counter()
+        with observe_queries(stats):
+            yield stats
+        stats.total_time = time.perf_counter() - started
+
+    def finish(self, request, response, stats):
+        if stats is not None:
+            self.report(request, response, stats)
+        return response
+
+    def process_template_response(self, request, response):
+        stats = getattr(request, "instrumentation", None)
+        if stats is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                stats.template_time = time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def report(self, request, response, stats):
+        logger.info(json.dumps(stats.as_dict(request, response)))
+
+        if getattr(settings, "TAXI_SERVER_TIMING", True):
+            timing = stats.server_timing()
+            if response.has_header("Server-Timing"):
+                timing = f"{response['Server-Timing']}, {timing}"
+            response["Server-Timing"] = timing
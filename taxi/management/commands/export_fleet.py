@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from taxi.transfer import FIELDS, FORMATS, export_rows, write_rows
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Stream manufacturers, cars or car-driver assignments to a CSV "
+        "or JSON lines file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(FIELDS))
+        parser.add_argument(
+            "path", nargs="?", default="-", help="File to write, - for stdout."
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Defaults to the file extension, csv for stdout.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or (
+            "csv" if path == "-" else path.rsplit(".", 1)[-1]
+        )
+        if fmt not in FORMATS:
+            raise CommandError("Pass --format, csv or jsonl.")
+
+        rows = export_rows(options["kind"], options["batch_size"])
+        if path == "-":
+            write_rows(options["kind"], rows, self.stdout, fmt)
+        else:
+            with open(path, "w", newline="", encoding="utf-8") as stream:
+                write_rows(options["kind"], rows, stream, fmt)
@@ -0,0 +1,53 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from taxi.transfer import FIELDS, FORMATS, import_rows
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Stream manufacturers, cars or car-driver assignments from a CSV "
+        "or JSON lines file into the database in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(FIELDS))
+        parser.add_argument("path", help="File to read, - for stdin.")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Defaults to the file extension.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--max-errors",
+            type=int,
+            default=20,
+            help="Number of rejected rows to print.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or path.rsplit(".", 1)[-1]
+        if fmt not in FORMATS:
+            raise CommandError("Pass --format, csv or jsonl.")
+
+        if path == "-":
+            result = import_rows(
+                options["kind"], sys.stdin, fmt, options["batch_size"]
+            )
+        else:
+            with open(path, newline="", encoding="utf-8") as stream:
+                result = import_rows(
+                    options["kind"], stream, fmt, options["batch_size"]
+                )
+
+        for error in result.errors[:options["max_errors"]]:
+            self.stderr.write(error)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.imported} {options['kind']}, "
+                f"rejected {len(result.errors)}"
+            )
+        )
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from taxi.querystats import read_stats, stats_dir
+
+
+SORT_KEYS = {
+    "total": lambda entry: entry["total"],
+    "count": lambda entry: entry["count"],
+    "max": lambda entry: entry["max"],
+    "mean": lambda entry: entry["total"] / entry["count"],
+}
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Print the queries with the most database time, added up over "
+        "the statistics files of all processes in TAXI_QUERY_STATS_DIR."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sort", choices=list(SORT_KEYS), default="total")
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument(
+            "--view", help="Only queries of views whose name contains this."
+        )
+        parser.add_argument(
+            "--dir", help="Defaults to the TAXI_QUERY_STATS_DIR setting."
+        )
+
+    def handle(self, *args, **options):
+        directory = options["dir"] or stats_dir()
+        if directory is None:
+            raise CommandError("Set TAXI_QUERY_STATS_DIR or pass --dir.")
+
+        entries = read_stats(directory)
+        if options["view"]:
+            entries = [
+                entry
+                for entry in entries
+                if options["view"] in (entry["view"] or "")
+            ]
+        entries.sort(key=SORT_KEYS[options["sort"]], reverse=True)
+
+        self.stdout.write(
+            f"{'total ms':>10} {'count':>8} {'mean ms':>9} {'max ms':>9}  view"
+        )
+        for entry in entries[: options["limit"]]:
+            self.stdout.write(
+                f"{entry['total'] * 1000:>10.1f} {entry['count']:>8} "
+                f"{entry['total'] / entry['count'] * 1000:>9.2f} "
+                f"{entry['max'] * 1000:>9.2f}  {entry['view']}"
+            )
+            self.stdout.write(f"    {entry['fingerprint']}")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from taxi import counters
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Recount drivers, cars, manufacturers and assignments and store "
+        "the results in the cache. Run periodically to fix counter drift."
+    )
+
+    def handle(self, *args, **options):
+        for name, count in counters.reconcile().items():
+            self.stdout.write(f"{name}: {count}")
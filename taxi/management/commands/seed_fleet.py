@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from taxi.seed import seed_fleet
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Bulk create a reproducible synthetic fleet of manufacturers, "
+        "drivers, cars and car-driver assignments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--manufacturers", type=int, default=100)
+        parser.add_argument("--drivers", type=int, default=10000)
+        parser.add_argument("--cars", type=int, default=20000)
+        parser.add_argument("--drivers-per-car", type=int, default=2)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed, the same seed gives the same fleet.",
+        )
+
+    def handle(self, *args, **options):
+        counts = seed_fleet(
+            manufacturers=options["manufacturers"],
+            drivers=options["drivers"],
+            cars=options["cars"],
+            drivers_per_car=options["drivers_per_car"],
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+            log=self.stdout.write,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                ", ".join(f"{count} {name}" for name, count in counts.items())
+            )
+        )
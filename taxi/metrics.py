@@ -0,0 +1,284 @@
+"""
+Prometheus metrics.
+
+MetricsMiddleware counts requests, their duration and their SQL
+queries per route, the Metered cache backends count cache hits and
+misses. Each process keeps its own Registry, guarded by one lock held
+only to add a number. Every TAXI_METRICS_FLUSH_INTERVAL seconds, and
+at exit, a process writes its registry to metrics-<pid>.json in
+TAXI_METRICS_DIR, and `metrics_view` adds up the files of all
+processes, so any worker can answer a scrape. Files of exited workers
+keep counting, empty the directory when the workers are restarted.
+Without TAXI_METRICS_DIR only the scraped process is reported.
+
+The gauges of cars, drivers, manufacturers and assignments are the
+cached counts of taxi.counters, kept current by the signals, so a
+scrape does not count rows.
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
+
+from .middleware import TaxiMiddleware, observe_queries
+
+
+FILE_PREFIX = "metrics-"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+METRICS = {
+    "taxi_http_requests_total": (
+        "counter",
+        "Requests by route, method and status.",
+    ),
+    "taxi_http_request_duration_seconds": (
+        "histogram",
+        "Request duration by route.",
+    ),
+    "taxi_db_queries_total": ("counter", "SQL queries by route."),
+    "taxi_cache_requests_total": (
+        "counter",
+        "Cache lookups by result, hit or miss.",
+    ),
+}
+
+
+def metrics_dir():
+    path = getattr(settings, "TAXI_METRICS_DIR", None)
+    return Path(path) if path else None
+
+
+class Registry:
+    """Counters and histograms of one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self._flushed_at = time.monotonic()
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        bucket = bisect.bisect_left(DURATION_BUCKETS, value)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [
+                    [0] * (len(DURATION_BUCKETS) + 1),
+                    0.0,
+                ]
+            histogram[0][bucket] += 1
+            histogram[1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": [
+                    [name, dict(labels), value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                "histograms": [
+                    [name, dict(labels), list(buckets), total]
+                    for (name, labels), (buckets, total) in (
+                        self.histograms.items()
+                    )
+                ],
+            }
+
+    def flush_due(self):
+        interval = getattr(settings, "TAXI_METRICS_FLUSH_INTERVAL", 10)
+        return time.monotonic() - self._flushed_at >= interval
+
+    def flush(self, directory=None):
+        """Replace this process's file with the current snapshot."""
+        directory = directory or metrics_dir()
+        self._flushed_at = time.monotonic()
+        if directory is None:
+            return
+
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{FILE_PREFIX}{os.getpid()}.json"
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, path)
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+
+def collect(directory=None):
+    """Add up the snapshots of all processes, or of this one."""
+    directory = directory or metrics_dir()
+    if directory is None:
+        snapshots = [registry.snapshot()]
+    else:
+        registry.flush(directory)
+        snapshots = [
+            json.loads(path.read_text())
+            for path in directory.glob(f"{FILE_PREFIX}*.json")
+        ]
+
+    merged = Registry()
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(sorted(labels.items())))
+            merged.counters[key] = merged.counters.get(key, 0) + value
+        for name, labels, buckets, total in snapshot["histograms"]:
+            key = (name, tuple(sorted(labels.items())))
+            histogram = merged.histograms.setdefault(
+                key, [[0] * len(buckets), 0.0]
+            )
+            histogram[0] = [a + b for a, b in zip(histogram[0], buckets)]
+            histogram[1] += total
+    return merged
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value)
+            .replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("\n", "\\n"),
+        )
+        for name, value in labels
+    )
+    return "{" + pairs + "}"
+
+
+def render(merged, gauges):
+    """Return the Prometheus text format of a merged registry."""
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (metric, labels), value in sorted(merged.counters.items()):
+            if metric == name:
+                lines.append(f"{name}{format_labels(labels)} {value}")
+        for (metric, labels), (buckets, total) in sorted(
+            merged.histograms.items()
+        ):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS + ("+Inf",), buckets):
+                cumulative += count
+                le = labels + (("le", bound),)
+                lines.append(
+                    f"{name}_bucket{format_labels(le)} {cumulative}"
+                )
+            lines.append(f"{name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{name}_count{format_labels(labels)} {cumulative}")
+
+    for name, count in gauges.items():
+        lines.append(f"# HELP taxi_{name} Number of {name}.")
+        lines.append(f"# TYPE taxi_{name} gauge")
+        lines.append(f"taxi_{name} {count}")
+    return "\n".join(lines) + "\n"
+
+
+@require_safe
+def metrics_view(request):
+    # Not imported at the top: the cache backends below load before
+    # the models.
+    from . import counters
+
+    gauges = counters.get_counts(*counters.COUNTED)
+    return HttpResponse(render(collect(), gauges), content_type=CONTENT_TYPE)
+
+
+class MetricsMiddleware(TaxiMiddleware):
+    """Put near the top of MIDDLEWARE, so durations cover the stack."""
+
+    @contextmanager
+    def around(self, request):
+        state = {"started": time.perf_counter(), "queries": 0}
+
+        def count(sql, duration):
+            state["queries"] += 1
+
+        with observe_queries(count):
+            yield state
+
+    def finish(self, request, response, state):
+        duration = time.perf_counter() - state["started"]
+        # Unmatched paths share one label, so scanners cannot grow the
+        # registry.
+        match = request.resolver_match
+        route = match.view_name if match else "unmatched"
+        registry.inc(
+            "taxi_http_requests_total",
+            {
+                "route": route,
+                "method": request.method,
+                "status": response.status_code,
+            },
+        )
+        registry.observe(
+            "taxi_http_request_duration_seconds", {"route": route}, duration
+        )
+        if state["queries"]:
+            registry.inc(
+                "taxi_db_queries_total", {"route": route}, state["queries"]
+            )
+
+        if registry.flush_due():
+            registry.flush()
+        return response
+
+
+class MeteredCacheMixin:
+    """Count hits and misses of get() and get_many()."""
+
+    _metered_missing = object()
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._metered_missing, version)
+        if value is self._metered_missing:
+            registry.inc("taxi_cache_requests_total", {"result": "miss"})
+            return default
+        registry.inc("taxi_cache_requests_total", {"result": "hit"})
+        return value
+
+
+class MeteredLocMemCache(MeteredCacheMixin, LocMemCache):
+    # LocMemCache.get_many() goes through get().
+    pass
+
+
+class MeteredRedisCache(MeteredCacheMixin, RedisCache):
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        registry.inc(
+            "taxi_cache_requests_total", {"result": "hit"}, len(found)
+        )
+        registry.inc(
+            "taxi_cache_requests_total",
+            {"result": "miss"},
+            len(keys) - len(found),
+        )
+        return found
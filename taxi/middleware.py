@@ -0,0 +1,89 @@
+"""
+Shared pieces of the taxi middleware.
+
+Django runs each middleware in the mode of the handler, adapting the
+ones that cannot: under ASGI a sync-only middleware pushes the rest of
+the stack, async views included, onto a thread. TaxiMiddleware
+subclasses run in either mode.
+
+Wrappers added with connection.execute_wrapper() only see the queries
+of their own thread, and the async ORM runs queries on a worker
+thread. So every connection gets one permanent wrapper when it
+connects (see taxi.signals), which reports each query to the
+observers of `observe_queries`. They are kept in a context variable,
+which sync_to_async carries over to the worker thread.
+"""
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
+query_observers = ContextVar("taxi_query_observers", default=())
+
+
+def notify_observers(execute, sql, params, many, context):
+    observers = query_observers.get()
+    if not observers:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        for observer in observers:
+            observer(sql, duration)
+
+
+def install_query_observers(connection):
+    if notify_observers not in connection.execute_wrappers:
+        connection.execute_wrappers.append(notify_observers)
+
+
+@contextmanager
+def observe_queries(observer):
+    """Call observer(sql, seconds) for every query run in the block."""
+    token = query_observers.set((*query_observers.get(), observer))
+    try:
+        yield
+    finally:
+        query_observers.reset(token)
+
+
+class TaxiMiddleware:
+    """
+    Middleware running sync or async, like the handler.
+
+    Subclasses override `around(request)`, a context manager around
+    the rest of the stack whose value is passed on as `state`, and
+    `finish(request, response, state)`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with self.around(request) as state:
+            response = self.get_response(request)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        with self.around(request) as state:
+            response = await self.get_response(request)
+        return self.finish(request, response, state)
+
+    def around(self, request):
+        return nullcontext()
+
+    def finish(self, request, response, state):
+        return response
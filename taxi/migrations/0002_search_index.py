@@ -0,0 +1,77 @@
+import sqlite3
+
+from django.db import migrations
+
+
+COLUMNS = [
+    ("taxi_car", "model"),
+    ("taxi_driver", "username"),
+    ("taxi_manufacturer", "name"),
+]
+
+
+def sqlite_statements(table, column):
+    search = f"{table}_{column}_search"
+    return [
+        f"CREATE VIRTUAL TABLE {search} USING fts5("
+        f"{column}, content='{table}', content_rowid='id', "
+        f"tokenize='trigram')",
+        f"CREATE TRIGGER {search}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {search}(rowid, {column}) "
+        f"VALUES (new.id, new.{column}); END",
+        f"CREATE TRIGGER {search}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {search}({search}, rowid, {column}) "
+        f"VALUES ('delete', old.id, old.{column}); END",
+        f"CREATE TRIGGER {search}_au AFTER UPDATE OF {column} ON {table} "
+        f"BEGIN "
+        f"INSERT INTO {search}({search}, rowid, {column}) "
+        f"VALUES ('delete', old.id, old.{column}); "
+        f"INSERT INTO {search}(rowid, {column}) "
+        f"VALUES (new.id, new.{column}); END",
+        f"INSERT INTO {search}({search}) VALUES ('rebuild')",
+    ]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite" and sqlite3.sqlite_version_info >= (3, 34):
+        for table, column in COLUMNS:
+            for statement in sqlite_statements(table, column):
+                schema_editor.execute(statement)
+    elif vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table, column in COLUMNS:
+            schema_editor.execute(
+                f"CREATE INDEX {table}_{column}_trgm ON {table} "
+                f"USING gin ((UPPER({column}::text)) gin_trgm_ops)"
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite" and sqlite3.sqlite_version_info >= (3, 34):
+        for table, column in COLUMNS:
+            search = f"{table}_{column}_search"
+            for suffix in ("ai", "ad", "au"):
+                schema_editor.execute(
+                    f"DROP TRIGGER IF EXISTS {search}_{suffix}"
+                )
+            schema_editor.execute(f"DROP TABLE IF EXISTS {search}")
+    elif vendor == "postgresql":
+        for table, column in COLUMNS:
+            schema_editor.execute(
+                f"DROP INDEX IF EXISTS {table}_{column}_trgm"
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("taxi", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("taxi", "0002_search_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="car",
+            index=models.Index(fields=["model"], name="car_model_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="car",
+            index=models.Index(
+                fields=["manufacturer", "model"],
+                name="car_manufacturer_model_idx",
+            ),
+        ),
+        # The auto-created through table takes no Meta.indexes. The
+        # unique (car_id, driver_id) index serves car.drivers, this one
+        # covers driver.cars without reading the table rows. The single
+        # column indexes Django made are kept: dropping the one on
+        # taxi_car.manufacturer_id makes SQLite rebuild taxi_car, which
+        # drops the search triggers of 0002.
+        migrations.RunSQL(
+            "CREATE INDEX car_drivers_driver_car_idx "
+            "ON taxi_car_drivers (driver_id, car_id)",
+            "DROP INDEX car_drivers_driver_car_idx",
+        ),
+    ]
@@ -33,5 +33,26 @@ class Car(models.Model):
     manufacturer = models.ForeignKey(Manufacturer, on_delete=models.CASCADE)
     drivers = models.ManyToManyField(Driver, related_name="cars")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["model"], name="car_model_idx"),
+            models.Index(
+                fields=["manufacturer", "model"],
+                name="car_manufacturer_model_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.model
+
+
+class VisitCount(models.Model):
+    """Home page visits of a driver, added up in batches by taxi.visits."""
+
+    driver = models.OneToOneField(
+        Driver,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="visit_count",
+    )
+    count = models.PositiveBigIntegerField(default=0)
@@ -0,0 +1,240 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404
+
+
+def encode_cursor(values, direction):
+    """Pack keyset values into an opaque, url-safe token."""
+    payload = json.dumps(
+        {"v": list(values), "d": direction},
+        cls=DjangoJSONEncoder,
+        separators=(",", ":"),
+    )
+    token = base64.urlsafe_b64encode(payload.encode())
+    return token.decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Unpack a token made by `encode_cursor` or raise Http404."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = payload["v"], payload["d"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise Http404("Invalid cursor")
+
+    if direction not in ("next", "prev") or not isinstance(values, list):
+        raise Http404("Invalid cursor")
+
+    return values, direction
+
+
+def ordering_field(model, name):
+    """Return the model field an ordering like "manufacturer__name" names."""
+    *relations, name = name.split("__")
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+
+def clean_cursor_values(model, fields, values):
+    """
+    Convert the values of a decoded cursor to the types of their fields
+    or raise Http404, so a forged token cannot fail the query.
+    """
+    cleaned = []
+    for name, value in zip(fields, values):
+        if value is None:
+            raise Http404("Invalid cursor")
+        try:
+            cleaned.append(ordering_field(model, name).to_python(value))
+        except (ValidationError, TypeError, ValueError):
+            raise Http404("Invalid cursor")
+    return cleaned
+
+
+def keyset_filter(fields, values, forward=True):
+    """
+    Build the "row comes after (or before) values" condition
+    for an ascending ordering over fields.
+    """
+    lookup = "gt" if forward else "lt"
+    condition = Q()
+
+    for index, field in enumerate(fields):
+        step = Q(**{f"{field}__{lookup}": values[index]})
+        for previous, value in zip(fields[:index], values[:index]):
+            step &= Q(**{previous: value})
+        condition |= step
+
+    return condition
+
+
+class CursorPage:
+    """Page of a keyset paginated queryset, shaped like Django's Page."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def cursor_queryset(queryset, fields, page_size, token=None):
+    """
+    Return (queryset, forward, values): the page of queryset after the
+    cursor token, with one extra row, and what the token said.
+    """
+    forward = True
+    values = None
+
+    if token:
+        values, direction = decode_cursor(token)
+        if len(values) != len(fields):
+            raise Http404("Invalid cursor")
+        values = clean_cursor_values(queryset.model, fields, values)
+        forward = direction == "next"
+        queryset = queryset.filter(keyset_filter(fields, values, forward))
+
+    if forward:
+        queryset = queryset.order_by(*fields)
+    else:
+        queryset = queryset.order_by(*(f"-{field}" for field in fields))
+
+    return queryset[:page_size + 1], forward, values
+
+
+def cursor_page(object_list, fields, page_size, forward, values):
+    """Build the CursorPage of the rows fetched from cursor_queryset."""
+    has_more = len(object_list) > page_size
+    object_list = object_list[:page_size]
+
+    if not forward:
+        object_list.reverse()
+
+    if not object_list:
+        return CursorPage(object_list)
+
+    def key(obj):
+        return [getattr(obj, field) for field in fields]
+
+    has_next = has_more if forward else True
+    has_previous = values is not None if forward else has_more
+
+    return CursorPage(
+        object_list,
+        next_cursor=(
+            encode_cursor(key(object_list[-1]), "next") if has_next else None
+        ),
+        previous_cursor=(
+            encode_cursor(key(object_list[0]), "prev")
+            if has_previous
+            else None
+        ),
+    )
+
+
+def paginate_by_cursor(queryset, fields, page_size, token=None):
+    """
+    Return a CursorPage of queryset ordered by fields.
+
+    The last field must be unique so that every row has a distinct
+    position. No COUNT query is run: one extra row is fetched to find
+    out whether another page exists in the requested direction.
+    """
+    fields = tuple(fields)
+    queryset, forward, values = cursor_queryset(
+        queryset, fields, page_size, token
+    )
+    return cursor_page(list(queryset), fields, page_size, forward, values)
+
+
+async def apaginate_by_cursor(queryset, fields, page_size, token=None):
+    """Async version of paginate_by_cursor."""
+    fields = tuple(fields)
+    queryset, forward, values = cursor_queryset(
+        queryset, fields, page_size, token
+    )
+    object_list = [obj async for obj in queryset]
+    return cursor_page(object_list, fields, page_size, forward, values)
+
+
+async def apaginate(queryset, page_size, number):
+    """
+    Async version of ListView's page number pagination: return the
+    Page `number` of queryset, counted with acount(), or raise Http404.
+    """
+    paginator = Paginator(queryset, page_size)
+    # Set before use, so Paginator does not count synchronously.
+    paginator.count = await queryset.acount()
+    if number == "last":
+        number = paginator.num_pages
+    try:
+        number = paginator.validate_number(number or 1)
+    except InvalidPage:
+        raise Http404("Invalid page")
+
+    bottom = (number - 1) * page_size
+    object_list = [obj async for obj in queryset[bottom:bottom + page_size]]
+    return Page(object_list, number, paginator)
+
+
+class CursorPaginationMixin:
+    """
+    Opt-in keyset pagination for list views.
+
+    With the TAXI_CURSOR_PAGINATION setting, or `cursor_pagination =
+    True` on a view, pages are opaque `?cursor=` tokens over
+    `cursor_ordering` instead of `?page=` numbers.
+    """
+
+    # None follows the TAXI_CURSOR_PAGINATION setting.
+    cursor_pagination = None
+    cursor_ordering = ("id",)
+    cursor_kwarg = "cursor"
+
+    def use_cursor_pagination(self):
+        if self.cursor_pagination is not None:
+            return self.cursor_pagination
+        return getattr(settings, "TAXI_CURSOR_PAGINATION", False)
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+
+        page = paginate_by_cursor(
+            queryset,
+            self.cursor_ordering,
+            page_size,
+            self.request.GET.get(self.cursor_kwarg),
+        )
+        return None, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.copy()
+        query.pop(self.page_kwarg, None)
+        query.pop(self.cursor_kwarg, None)
+        context["page_query"] = f"{query.urlencode()}&" if query else ""
+        return context
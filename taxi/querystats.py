@@ -0,0 +1,155 @@
+"""
+Aggregated query statistics and slow query log.
+
+QueryStatsMiddleware observes every query of a request (see
+taxi.middleware) and adds its time to a per-process QueryStats under
+the view name and the query's fingerprint (see taxi.instrumentation).
+Queries over TAXI_SLOW_QUERY_MS are also logged on the
+"taxi.querystats" logger.
+
+The statistics keep at most TAXI_QUERY_STATS_MAX_ENTRIES entries,
+a new entry replaces the one with the least total time. Every
+TAXI_QUERY_STATS_FLUSH_INTERVAL seconds, and at exit, each process
+writes its statistics to querystats-<pid>.json in
+TAXI_QUERY_STATS_DIR. `manage.py query_stats` adds up the files and
+prints the top offenders. Without TAXI_QUERY_STATS_DIR the middleware
+is not used.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .instrumentation import fingerprint
+from .middleware import TaxiMiddleware, observe_queries
+
+
+logger = logging.getLogger(__name__)
+
+FILE_PREFIX = "querystats-"
+
+
+def stats_dir():
+    path = getattr(settings, "TAXI_QUERY_STATS_DIR", None)
+    return Path(path) if path else None
+
+
+class QueryStats:
+    """Count, total and max seconds per (view, fingerprint)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._flushed_at = time.monotonic()
+
+    def add(self, view, sql, duration):
+        key = (view, fingerprint(sql))
+        max_entries = getattr(settings, "TAXI_QUERY_STATS_MAX_ENTRIES", 1000)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= max_entries:
+                    cheapest = min(
+                        self._entries, key=lambda k: self._entries[k][1]
+                    )
+                    del self._entries[cheapest]
+                entry = self._entries[key] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+
+    def entries(self):
+        with self._lock:
+            return [
+                {
+                    "view": view,
+                    "fingerprint": sql,
+                    "count": count,
+                    "total": total,
+                    "max": longest,
+                }
+                for (view, sql), (count, total, longest) in (
+                    self._entries.items()
+                )
+            ]
+
+    def flush_due(self):
+        interval = getattr(settings, "TAXI_QUERY_STATS_FLUSH_INTERVAL", 60)
+        return time.monotonic() - self._flushed_at >= interval
+
+    def flush(self, directory=None):
+        """Replace this process's file with the current statistics."""
+        directory = directory or stats_dir()
+        self._flushed_at = time.monotonic()
+        if directory is None:
+            return
+
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{FILE_PREFIX}{os.getpid()}.json"
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(
+            json.dumps({"written_at": time.time(), "entries": self.entries()})
+        )
+        os.replace(temporary, path)
+
+
+def read_stats(directory):
+    """Add up the statistics files of all processes in directory."""
+    merged = {}
+    for path in Path(directory).glob(f"{FILE_PREFIX}*.json"):
+        for entry in json.loads(path.read_text())["entries"]:
+            key = (entry["view"], entry["fingerprint"])
+            if key in merged:
+                total = merged[key]
+                total["count"] += entry["count"]
+                total["total"] += entry["total"]
+                total["max"] = max(total["max"], entry["max"])
+            else:
+                merged[key] = dict(entry)
+    return list(merged.values())
+
+
+query_stats = QueryStats()
+atexit.register(query_stats.flush)
+
+
+class QueryStatsMiddleware(TaxiMiddleware):
+    def __init__(self, get_response):
+        if stats_dir() is None:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    @contextmanager
+    def around(self, request):
+        slow = getattr(settings, "TAXI_SLOW_QUERY_MS", 200) / 1000
+
+        def record(sql, duration):
+            match = request.resolver_match
+            view = match.view_name if match else None
+            query_stats.add(view, sql, duration)
+            if duration >= slow:
+                logger.warning(
+                    json.dumps(
+                        {
+                            "view": view,
+                            "ms": round(duration * 1000, 2),
+                            "fingerprint": fingerprint(sql),
+                        }
+                    )
+                )
+
+        with observe_queries(record):
+            yield
+
+    def finish(self, request, response, state):
+        if query_stats.flush_due():
+            query_stats.flush()
+        return response
@@ -0,0 +1,119 @@
+"""
+Read replica routing.
+
+ReplicaRoutingMiddleware picks one of the TAXI_READ_REPLICAS aliases
+for each GET or HEAD request and ReplicaRouter sends that request's
+reads there. Writes, and every query of other requests, go to the
+primary ("default"). A request that wrote sets a short-lived cookie
+that keeps the client's reads on the primary for
+TAXI_PRIMARY_STICKY_SECONDS, so users see their own changes while the
+replicas catch up.
+
+Other clients are kept off the replicas by the versions: for
+TAXI_PRIMARY_STICKY_SECONDS after a bump, a request reading that
+version reads from the primary (see taxi.versions), so what it caches
+under the new version is not rendered from rows a replica lacks.
+
+Views that write on GET are marked with `use_primary`. Outside a
+request, e.g. in management commands, everything uses the primary.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .middleware import TaxiMiddleware
+
+
+STICKY_COOKIE = "taxi_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# A lagging replica must not log users out.
+PRIMARY_APPS = {"sessions"}
+
+# Alias reads of the current request go to, None for the primary.
+read_alias = ContextVar("taxi_read_alias", default=None)
+
+
+def replicas():
+    return list(getattr(settings, "TAXI_READ_REPLICAS", []))
+
+
+def sticky_seconds():
+    return getattr(settings, "TAXI_PRIMARY_STICKY_SECONDS", 10)
+
+
+def read_from_primary():
+    """Send the remaining reads of the current request to the primary."""
+    read_alias.set(None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            # Related objects are read where the instance came from.
+            return instance._state.db
+        if model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        return read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in replicas()
+
+
+def use_primary(view):
+    """Serve the view from the primary and make the client sticky."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.wrote_to_primary = True
+        token = read_alias.set(None)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            read_alias.reset(token)
+
+    return wrapper
+
+
+class ReplicaRoutingMiddleware(TaxiMiddleware):
+    @contextmanager
+    def around(self, request):
+        aliases = replicas()
+        alias = None
+        if (
+            aliases
+            and request.method in SAFE_METHODS
+            and STICKY_COOKIE not in request.COOKIES
+        ):
+            alias = random.choice(aliases)
+
+        token = read_alias.set(alias)
+        try:
+            yield
+        finally:
+            read_alias.reset(token)
+
+    def finish(self, request, response, state):
+        if replicas() and (
+            request.method not in SAFE_METHODS
+            or getattr(request, "wrote_to_primary", False)
+        ):
+            response.set_cookie(
+                STICKY_COOKIE,
+                "1",
+                max_age=sticky_seconds(),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
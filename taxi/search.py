@@ -0,0 +1,101 @@
+import sqlite3
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+
+# (db_table, column) pairs covered by the substring search index,
+# see migration 0002_search_index.
+INDEXED_COLUMNS = {
+    ("taxi_car", "model"),
+    ("taxi_driver", "username"),
+    ("taxi_manufacturer", "name"),
+}
+
+
+TRIGGER_SUFFIXES = ("ai", "ad", "au")
+
+
+def search_table(db_table, column):
+    return f"{db_table}_{column}_search"
+
+
+def triggers_exist(db_table, column):
+    """
+    SQL condition true while the triggers keeping the index of column
+    current exist. SQLite drops them whenever a migration rebuilds
+    the table, after which the index misses new and changed rows.
+    """
+    table = search_table(db_table, column)
+    names = ", ".join(f"'{table}_{suffix}'" for suffix in TRIGGER_SUFFIXES)
+    return (
+        f"(SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' "
+        f"AND tbl_name = '{db_table}' AND name IN ({names})) "
+        f"= {len(TRIGGER_SUFFIXES)}"
+    )
+
+
+class SubstringSearch:
+    """Case-insensitive substring search, i.e. plain `icontains`."""
+
+    def filter(self, queryset, field, term):
+        return queryset.filter(**{f"{field}__icontains": term})
+
+
+class SQLiteTrigramSearch(SubstringSearch):
+    """
+    Substring search narrowed by an FTS5 trigram index.
+
+    The FTS5 tables are external content tables kept in sync with the
+    model tables by triggers, so rows written with `bulk_create` or
+    `update` are indexed too. The index only preselects candidate rows:
+    the `icontains` filter is still applied, which keeps the results
+    identical to LIKE '%term%'. Should the triggers be gone, every row
+    is a candidate, which is a plain `icontains` again. The check is
+    part of the query, so building the queryset runs none.
+    """
+
+    min_length = 3
+
+    def filter(self, queryset, field, term):
+        queryset = super().filter(queryset, field, term)
+        column = queryset.model._meta.get_field(field).column
+        db_table = queryset.model._meta.db_table
+
+        if (
+            len(term) < self.min_length
+            or (db_table, column) not in INDEXED_COLUMNS
+            or connections[queryset.db].vendor != "sqlite"
+        ):
+            return queryset
+
+        table = search_table(db_table, column)
+        ready = triggers_exist(db_table, column)
+        phrase = '"{}"'.format(term.replace('"', '""'))
+        # The one-row subquery goes first in the join, so SQLite skips
+        # the scan of db_table while the triggers exist.
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {table} WHERE {table} MATCH %s "
+                f"AND {ready} "
+                f"UNION ALL SELECT {db_table}.id "
+                f"FROM (SELECT 1 WHERE NOT {ready}) CROSS JOIN {db_table}",
+                (phrase,),
+            )
+        )
+
+
+def default_backend_path():
+    if connections["default"].vendor == "sqlite":
+        if sqlite3.sqlite_version_info >= (3, 34):
+            return "taxi.search.SQLiteTrigramSearch"
+    # On PostgreSQL the pg_trgm GIN indexes serve `icontains` directly.
+    return "taxi.search.SubstringSearch"
+
+
+def get_search_backend():
+    """Return the backend named by TAXI_SEARCH_BACKEND, or the default."""
+    path = getattr(settings, "TAXI_SEARCH_BACKEND", None)
+    return import_string(path or default_backend_path())()
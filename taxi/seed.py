@@ -0,0 +1,143 @@
+import random
+import string
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from . import counters, versions
+from .models import Car, Driver, Manufacturer
+
+
+BRANDS = [
+    "Toyota", "Honda", "Ford", "BMW", "Audi", "Kia", "Skoda", "Renault",
+    "Hyundai", "Volvo", "Tesla", "Nissan", "Mazda", "Fiat", "Peugeot",
+]
+COUNTRIES = [
+    "Japan", "USA", "Germany", "South Korea", "Czechia", "France",
+    "Sweden", "Italy", "Ukraine",
+]
+MODELS = [
+    "Camry", "Corolla", "Civic", "Focus", "Octavia", "Passat", "Model 3",
+    "Leaf", "Sportage", "Tucson", "Megane", "Golf", "Prius", "Ioniq",
+]
+FIRST_NAMES = [
+    "Olena", "Taras", "Maria", "John", "Anna", "Ivan", "Sofia", "Max",
+    "Oksana", "Petro", "Kate", "Andrii", "Lily", "Mark",
+]
+LAST_NAMES = [
+    "Shevchenko", "Kovalenko", "Bondarenko", "Smith", "Tkachenko",
+    "Kravchenko", "Melnyk", "Brown", "Boyko", "Moroz",
+]
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def license_number(number):
+    """
+    Unique license number for a sequence number, shaped as
+    validate_license_number expects: 3 uppercase letters, 5 digits.
+    """
+    letters = ""
+    prefix = number // 100000
+    for _ in range(3):
+        prefix, letter = divmod(prefix, 26)
+        letters = string.ascii_uppercase[letter] + letters
+    return f"{letters}{number % 100000:05}"
+
+
+def last_id(model):
+    return model.objects.order_by("-id").values_list("id", flat=True).first()
+
+
+def seed_fleet(
+    manufacturers=0,
+    drivers=0,
+    cars=0,
+    drivers_per_car=0,
+    batch_size=1000,
+    seed=0,
+    log=None,
+):
+    """
+    Bulk create a reproducible fleet on top of the existing rows.
+
+    New rows are numbered from the largest id of their table. Ids are
+    never reused and every seeded row's number is below its id, so
+    running again adds rows instead of colliding with earlier ones,
+    also after rows were deleted.
+    Each new car is assigned `drivers_per_car` random drivers.
+    """
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    password = make_password(None)
+
+    with transaction.atomic():
+        start = last_id(Manufacturer) or 0
+        Manufacturer.objects.bulk_create(
+            (
+                Manufacturer(
+                    name=f"{rng.choice(BRANDS)} {number}",
+                    country=rng.choice(COUNTRIES),
+                )
+                for number in range(start, start + manufacturers)
+            ),
+            batch_size=batch_size,
+        )
+        log(f"Created {manufacturers} manufacturers")
+
+        start = last_id(Driver) or 0
+        for numbers in batched(range(start, start + drivers), batch_size):
+            Driver.objects.bulk_create(
+                Driver(
+                    username=f"driver{number}",
+                    password=password,
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    license_number=license_number(number),
+                )
+                for number in numbers
+            )
+        log(f"Created {drivers} drivers")
+
+        manufacturer_ids = list(
+            Manufacturer.objects.values_list("id", flat=True)
+        )
+        previous_car_id = last_id(Car) or 0
+        for numbers in batched(range(cars), batch_size):
+            Car.objects.bulk_create(
+                Car(
+                    model=rng.choice(MODELS),
+                    manufacturer_id=rng.choice(manufacturer_ids),
+                )
+                for _ in numbers
+            )
+        log(f"Created {cars} cars")
+
+        driver_ids = list(Driver.objects.values_list("id", flat=True))
+        drivers_per_car = min(drivers_per_car, len(driver_ids))
+        new_car_ids = (
+            Car.objects.filter(id__gt=previous_car_id)
+            .order_by("id")
+            .values_list("id", flat=True)
+            .iterator(chunk_size=batch_size)
+        )
+        links = 0
+        for car_ids in batched(new_car_ids, batch_size):
+            batch = [
+                Car.drivers.through(car_id=car_id, driver_id=driver_id)
+                for car_id in car_ids
+                for driver_id in rng.sample(driver_ids, drivers_per_car)
+            ]
+            Car.drivers.through.objects.bulk_create(batch)
+            versions.bump_drivers({link.driver_id for link in batch})
+            links += len(batch)
+        log(f"Created {links} car-driver assignments")
+
+    # bulk_create sends no signals, so the cached counts are stale.
+    versions.bump(*versions.TABLES)
+    return counters.reconcile()
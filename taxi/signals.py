@@ -0,0 +1,120 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from . import counters, versions
+from .middleware import install_query_observers
+from .models import Car, Driver, Manufacturer
+
+
+COUNTER_NAMES = {
+    Driver: "drivers",
+    Car: "cars",
+    Manufacturer: "manufacturers",
+}
+
+
+@receiver(post_save, sender=Driver)
+@receiver(post_save, sender=Car)
+@receiver(post_save, sender=Manufacturer)
+def count_created(sender, created, **kwargs):
+    if created:
+        counters.adjust(COUNTER_NAMES[sender], 1)
+
+
+@receiver(post_delete, sender=Driver)
+@receiver(post_delete, sender=Car)
+@receiver(post_delete, sender=Manufacturer)
+def count_deleted(sender, **kwargs):
+    counters.adjust(COUNTER_NAMES[sender], -1)
+    # Cascades drop assignment rows without sending m2m_changed.
+    counters.invalidate("assignments")
+
+
+@receiver(m2m_changed, sender=Car.drivers.through)
+def count_assignments(action, pk_set, **kwargs):
+    if action == "post_add":
+        counters.adjust("assignments", len(pk_set))
+    elif action == "post_remove":
+        counters.adjust("assignments", -len(pk_set))
+    elif action == "post_clear":
+        counters.invalidate("assignments")
+
+
+# Versions. Table versions back conditional GET of the list pages and
+# the API. Object versions back the detail pages: car detail shows the
+# car's drivers, driver detail the driver's cars with manufacturers.
+
+DRIVER_LIST_FIELDS = {"username", "first_name", "last_name"}
+# Logging in saves last_login, which no page shows.
+UNSHOWN_DRIVER_FIELDS = {"last_login"}
+
+
+@receiver(post_save, sender=Car)
+def car_saved(instance, created, **kwargs):
+    versions.bump("cars")
+    versions.bump_cars([instance.pk])
+    if not created:
+        versions.bump_drivers(
+            instance.drivers.values_list("pk", flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Car)
+def car_deleted(instance, **kwargs):
+    versions.bump("cars", "assignments")
+    versions.bump_cars([instance.pk])
+    versions.bump_drivers(instance.drivers.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Driver)
+def driver_saved(instance, created, update_fields, **kwargs):
+    fields = set(update_fields or ())
+    if update_fields is not None and fields <= UNSHOWN_DRIVER_FIELDS:
+        return
+
+    versions.bump("drivers")
+    versions.bump_drivers([instance.pk])
+    if not created and (update_fields is None or DRIVER_LIST_FIELDS & fields):
+        versions.bump_cars(instance.cars.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Driver)
+def driver_deleted(instance, **kwargs):
+    versions.bump("drivers", "assignments")
+    versions.bump_drivers([instance.pk])
+    versions.bump_cars(instance.cars.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Manufacturer)
+@receiver(post_delete, sender=Manufacturer)
+def manufacturer_changed(**kwargs):
+    versions.bump("manufacturers")
+
+
+@receiver(m2m_changed, sender=Car.drivers.through)
+def assignments_changed(instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        # The related ids are gone after the clear, collect them now.
+        related = instance.cars if reverse else instance.drivers
+        pk_set = set(related.values_list("pk", flat=True))
+    elif action not in ("post_add", "post_remove"):
+        return
+
+    versions.bump("assignments")
+    if reverse:
+        versions.bump_drivers([instance.pk])
+        versions.bump_cars(pk_set)
+    else:
+        versions.bump_cars([instance.pk])
+        versions.bump_drivers(pk_set)
+
+
+@receiver(connection_created)
+def observe_connection(sender, connection, **kwargs):
+    install_query_observers(connection)
@@ -0,0 +1,129 @@
+"""
+Query budget harness for the taxi routes.
+
+Walks every named route in taxi/urls.py, records the number of SQL
+queries and the total database time of a GET request with an empty
+cache (cold) and of the same request repeated (warm), and checks them
+against a per-route budget. Running the walk at several data sizes
+also catches query counts that grow with the data (N+1), inside
+cached fragments as well as outside.
+"""
+import os
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, URLPattern, reverse
+
+from taxi import urls as taxi_urls
+from taxi.models import Car, Driver, Manufacturer
+from taxi.seed import seed_fleet
+
+
+DEFAULT_SIZES = (10, 100)
+
+
+def budget_sizes():
+    """Data sizes to walk, e.g. TAXI_QUERY_BUDGET_SIZES=10,1000,100000"""
+    sizes = os.environ.get("TAXI_QUERY_BUDGET_SIZES")
+    if not sizes:
+        return DEFAULT_SIZES
+    return tuple(int(size) for size in sizes.split(","))
+
+
+def route_names():
+    names = []
+    for pattern in taxi_urls.urlpatterns:
+        if isinstance(pattern, URLPattern) and pattern.name not in names:
+            names.append(pattern.name)
+    return names
+
+
+def seed(size, user):
+    """
+    Grow the fleet to `size` rows per table.
+
+    The first car is assigned to every driver and `user` to every car,
+    so detail pages of both show `size` related rows.
+    """
+    seed_fleet(
+        manufacturers=max(size - Manufacturer.objects.count(), 0),
+        drivers=max(size - Driver.objects.count(), 0),
+        cars=max(size - Car.objects.count(), 0),
+    )
+
+    first_car = Car.objects.order_by("id").first()
+    driver_ids = Driver.objects.values_list("id", flat=True)
+    car_ids = Car.objects.values_list("id", flat=True)
+    pairs = {(first_car.id, driver_id) for driver_id in driver_ids}
+    pairs |= {(car_id, user.id) for car_id in car_ids}
+    Car.drivers.through.objects.bulk_create(
+        (
+            Car.drivers.through(car_id=car_id, driver_id=driver_id)
+            for car_id, driver_id in pairs
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def route_url(name, user):
+    """URL of a route, using the most connected object for <pk>."""
+    try:
+        return reverse(f"taxi:{name}")
+    except NoReverseMatch:
+        pass
+
+    resource = name.removeprefix("api-").removeprefix("async-")
+    if resource.startswith("manufacturer"):
+        pk = Manufacturer.objects.order_by("id").first().pk
+    elif resource.startswith("driver"):
+        pk = user.pk
+    else:
+        pk = Car.objects.order_by("id").first().pk
+
+    return reverse(f"taxi:{name}", kwargs={"pk": pk})
+
+
+TEMPERATURES = ("cold", "warm")
+
+
+def get(client, url):
+    """Return (status code, query count, db seconds) of a GET."""
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+        if response.streaming:
+            b"".join(response.streaming_content)
+
+    db_time = sum(float(query["time"]) for query in queries)
+    return response.status_code, len(queries), db_time
+
+
+def measure(client, url):
+    """Return {"cold": result, "warm": result} of GET url, see `get`."""
+    cache.clear()
+    cold = get(client, url)
+    return {"cold": cold, "warm": get(client, url)}
+
+
+def walk(client, user, sizes=None):
+    """Return {route name: {size: {temperature: result}}}, see `measure`."""
+    results = {name: {} for name in route_names()}
+
+    for size in sizes or budget_sizes():
+        seed(size, user)
+        for name in results:
+            results[name][size] = measure(client, route_url(name, user))
+
+    return results
+
+
+def report(results):
+    lines = []
+    for name, by_size in results.items():
+        for temperature in TEMPERATURES:
+            cells = []
+            for size, by_temperature in by_size.items():
+                status, count, db_time = by_temperature[temperature]
+                cells.append(f"{size}: {count}q {db_time * 1000:.2f}ms")
+            lines.append(f"{name:<24} {temperature:<5} {', '.join(cells)}")
+    return "\n".join(lines)
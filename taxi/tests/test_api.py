@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from taxi.models import Car, Manufacturer
+
+
+class ApiTests(TestCase):
+    """Test the read-only JSON API"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="driver1",
+            password="pass123",
+            first_name="Anna",
+            license_number="DRV00001"
+        )
+        self.client.force_login(self.user)
+        self.manufacturer = Manufacturer.objects.create(
+            name="Toyota", country="Japan"
+        )
+        self.cars = [
+            Car.objects.create(model=model, manufacturer=self.manufacturer)
+            for model in ("Camry", "Corolla", "Prius")
+        ]
+        self.cars[0].drivers.add(self.user)
+
+    def test_login_required(self):
+        """Test anonymous requests are redirected to login"""
+        self.client.logout()
+        response = self.client.get(reverse("taxi:api-car-list"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_default_fields(self):
+        """Test a car list embeds the manufacturer but not the drivers"""
+        response = self.client.get(reverse("taxi:api-car-list"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["results"][0],
+            {
+                "id": self.cars[0].pk,
+                "model": "Camry",
+                "manufacturer": {
+                    "id": self.manufacturer.pk,
+                    "name": "Toyota",
+                    "country": "Japan",
+                },
+            },
+        )
+
+    def test_sparse_nested_fields(self):
+        """Test only the requested fields are returned and loaded"""
+        url = reverse("taxi:api-car-detail", args=[self.cars[0].pk])
+
+        # session, user, car, drivers
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                url, {"fields": "model,drivers.username"}
+            )
+
+        self.assertEqual(
+            response.json(),
+            {
+                "id": self.cars[0].pk,
+                "model": "Camry",
+                "drivers": [{"id": self.user.pk, "username": "driver1"}],
+            },
+        )
+
+    def test_reverse_relation(self):
+        """Test drivers can embed their cars"""
+        response = self.client.get(
+            reverse("taxi:api-driver-detail", args=[self.user.pk]),
+            {"fields": "username,cars.model"},
+        )
+        self.assertEqual(
+            response.json()["cars"],
+            [{"id": self.cars[0].pk, "model": "Camry"}],
+        )
+
+    def test_unknown_field(self):
+        """Test unknown or private fields give 400"""
+        url = reverse("taxi:api-driver-list")
+        for fields in ("password", "cars.drivers", "username.first"):
+            response = self.client.get(url, {"fields": fields})
+            self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pagination(self):
+        """Test pages are chained with next cursors"""
+        url = reverse("taxi:api-car-list")
+        first = self.client.get(url, {"limit": 2}).json()
+        second = self.client.get(
+            url, {"limit": 2, "cursor": first["next"]}
+        ).json()
+
+        self.assertEqual(
+            [car["model"] for car in first["results"]], ["Camry", "Corolla"]
+        )
+        self.assertEqual(
+            [car["model"] for car in second["results"]], ["Prius"]
+        )
+        self.assertIsNone(second["next"])
+
+    def test_conditional_get(self):
+        """Test a matching If-None-Match gives 304 until data changes"""
+        url = reverse(
+            "taxi:api-manufacturer-detail", args=[self.manufacturer.pk]
+        )
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        self.manufacturer.country = "USA"
+        self.manufacturer.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_object(self):
+        """Test an unknown pk gives 404"""
+        response = self.client.get(
+            reverse("taxi:api-car-detail", args=[self.cars[-1].pk + 1])
+        )
+        self.assertEqual(response.status_code, 404)
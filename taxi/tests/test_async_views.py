@@ -0,0 +1,167 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from taxi.models import Car, Manufacturer
+from taxi.tests.threads import count_thread_hops
+
+
+# Hops outside the taxi code: Django's middleware, the
+# request_started and request_finished signals, ORM queries and, in
+# development, the debug toolbar.
+DJANGO_HOPS = (
+    "django.middleware.",
+    "django.contrib.",
+    "django.dispatch.",
+    "django.http.response.",
+    "django.db.models.query.",
+    "debug_toolbar.",
+)
+
+
+class AsyncViewTests(TestCase):
+    """Test the async pages match their sync versions"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.manufacturer = Manufacturer.objects.create(
+            name="Toyota",
+            country="Japan"
+        )
+        self.cars = [
+            Car.objects.create(
+                model=f"Camry {number}", manufacturer=self.manufacturer
+            )
+            for number in range(7)
+        ]
+        self.cars[0].drivers.add(self.user)
+
+    async def test_car_list_pages(self):
+        """Test the async car list is paginated like the sync one"""
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(
+            reverse("taxi:async-car-list"), {"page": 2}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [car.pk for car in response.context["car_list"]],
+            [car.pk for car in self.cars[5:]],
+        )
+        self.assertEqual(response.context["paginator"].count, 7)
+        self.assertTrue(response.context["is_paginated"])
+
+    async def test_search(self):
+        """Test the search field filters the list"""
+        response = await self.async_client.get(
+            reverse("taxi:async-car-list"), {"model": "camry 3"}
+        )
+
+        self.assertEqual(
+            [car.pk for car in response.context["car_list"]],
+            [self.cars[3].pk],
+        )
+        self.assertEqual(response.context["search_query"], "camry 3")
+
+    async def test_invalid_page(self):
+        """Test pages out of range are not found"""
+        response = await self.async_client.get(
+            reverse("taxi:async-manufacturer-list"), {"page": 9}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_driver_list_requires_login(self):
+        """Test anonymous users are redirected to the login page"""
+        response = await self.async_client.get(
+            reverse("taxi:async-driver-list")
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("/accounts/login/", response["Location"])
+
+    async def test_car_detail(self):
+        """Test drivers are shown and cached like the sync page"""
+        await self.async_client.aforce_login(self.user)
+        url = reverse("taxi:async-car-detail", args=[self.cars[0].pk])
+
+        response = await self.async_client.get(url)
+        self.assertContains(response, self.user.username)
+        self.assertContains(response, "1 assigned")
+        self.assertTrue(response.context["car"].is_assigned)
+
+        # The drivers fragment is cached, only car.drivers is skipped.
+        response = await self.async_client.get(url)
+        self.assertContains(response, "1 assigned")
+        self.assertNotIn("drivers", response.context)
+
+    async def test_driver_detail(self):
+        """Test a driver's cars are shown"""
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(
+            reverse("taxi:async-driver-detail", args=[self.user.pk])
+        )
+
+        self.assertContains(response, "Camry 0")
+        self.assertContains(response, "1 assigned")
+
+    async def test_not_modified(self):
+        """Test a matching ETag gives 304"""
+        await self.async_client.aforce_login(self.user)
+        url = reverse("taxi:async-car-list")
+        etag = (await self.async_client.get(url))["ETag"]
+
+        response = await self.async_client.get(
+            url, headers={"If-None-Match": etag}
+        )
+
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(TAXI_INSTRUMENTATION_SAMPLE_RATE=1)
+    async def test_queries_are_observed(self):
+        """Test middleware sees the queries run on the ORM's thread"""
+        with self.assertLogs("taxi.instrumentation") as logs:
+            await self.async_client.get(reverse("taxi:async-car-list"))
+
+        report = json.loads(logs.records[0].getMessage())
+        # count, page
+        self.assertEqual(report["sql_count"], 2)
+
+    async def test_views_do_not_hop_threads(self):
+        """Test only Django's middleware and the ORM leave the loop"""
+        await self.async_client.aforce_login(self.user)
+        urls = [
+            reverse("taxi:async-manufacturer-list"),
+            reverse("taxi:async-car-list"),
+            reverse("taxi:async-driver-list"),
+            reverse("taxi:async-car-detail", args=[self.cars[0].pk]),
+            reverse("taxi:async-driver-detail", args=[self.user.pk]),
+        ]
+
+        for url in urls:
+            with count_thread_hops() as hops:
+                response = await self.async_client.get(url)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                [name for name in hops if not name.startswith(DJANGO_HOPS)],
+                [],
+                url,
+            )
+
+    async def test_sync_views_hop_threads(self):
+        """Test the measurement sees a sync view run on a thread"""
+        with count_thread_hops() as hops:
+            await self.async_client.get(reverse("taxi:car-list"))
+
+        self.assertTrue(
+            [name for name in hops if name.startswith("taxi.views.")]
+        )
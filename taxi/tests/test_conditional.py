@@ -0,0 +1,159 @@
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils.http import http_date
+
+from taxi.models import Manufacturer, Car
+
+
+@contextmanager
+def clock(seconds):
+    """Stop the clock of versions and Last-Modified at seconds."""
+    frozen = mock.Mock()
+    frozen.time.return_value = seconds
+    frozen.time_ns.return_value = int(seconds * 1e9)
+    with mock.patch("taxi.versions.time", frozen), mock.patch(
+        "taxi.conditional.time", frozen
+    ):
+        yield
+
+
+class ConditionalGetTests(TestCase):
+    """Test list and detail pages answer conditional requests with 304"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.client.force_login(self.user)
+        self.manufacturer = Manufacturer.objects.create(
+            name="Toyota",
+            country="Japan"
+        )
+        self.car = Car.objects.create(
+            model="Camry",
+            manufacturer=self.manufacturer
+        )
+        self.car_url = reverse("taxi:car-detail", args=[self.car.pk])
+
+    def test_not_modified_skips_queries(self):
+        """Test a matching ETag gives 304 with only the auth queries"""
+        url = reverse("taxi:car-list")
+        etag = self.client.get(url)["ETag"]
+
+        # session, user
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_if_modified_since(self):
+        """Test Last-Modified is honoured without an ETag"""
+        url = reverse("taxi:manufacturer-list")
+        start = int(time.time())
+        with clock(start + 0.2):
+            self.client.get(url)
+        with clock(start + 1.5):
+            last_modified = self.client.get(url)["Last-Modified"]
+
+            response = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+        self.assertEqual(last_modified, http_date(start + 1))
+        self.assertEqual(response.status_code, 304)
+
+    def test_change_within_second_gives_fresh_page(self):
+        """Test a change in the second of Last-Modified gives 200"""
+        url = reverse("taxi:manufacturer-list")
+        start = int(time.time())
+        with clock(start + 0.2):
+            response = self.client.get(url)
+        # The second is not over, a change may still follow within it.
+        self.assertNotIn("Last-Modified", response)
+
+        with clock(start + 0.6):
+            self.manufacturer.name = "Lexus"
+            self.manufacturer.save()
+        with clock(start + 0.7):
+            response = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=http_date(start)
+            )
+        self.assertContains(response, "Lexus")
+
+        with clock(start + 1.5):
+            last_modified = self.client.get(url)["Last-Modified"]
+        with clock(start + 1.6):
+            self.manufacturer.name = "Toyota"
+            self.manufacturer.save()
+        with clock(start + 2.5):
+            response = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+        self.assertContains(response, "Toyota")
+
+    def test_change_gives_fresh_page(self):
+        """Test saving a manufacturer changes the car pages' ETags"""
+        list_etag = self.client.get(reverse("taxi:car-list"))["ETag"]
+        detail_etag = self.client.get(self.car_url)["ETag"]
+
+        self.manufacturer.name = "Lexus"
+        self.manufacturer.save()
+
+        response = self.client.get(
+            reverse("taxi:car-list"), HTTP_IF_NONE_MATCH=list_etag
+        )
+        self.assertContains(response, "Lexus")
+        response = self.client.get(
+            self.car_url, HTTP_IF_NONE_MATCH=detail_etag
+        )
+        self.assertContains(response, "Lexus")
+
+    def test_assignment_gives_fresh_page(self):
+        """Test toggling an assignment changes the car and driver ETags"""
+        car_etag = self.client.get(self.car_url)["ETag"]
+        driver_url = reverse("taxi:driver-detail", args=[self.user.pk])
+        driver_etag = self.client.get(driver_url)["ETag"]
+
+        self.client.get(
+            reverse("taxi:toggle-car-assign", args=[self.car.pk])
+        )
+
+        response = self.client.get(self.car_url, HTTP_IF_NONE_MATCH=car_etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            driver_url, HTTP_IF_NONE_MATCH=driver_etag
+        )
+        self.assertContains(response, "Camry")
+
+    def test_etag_depends_on_user(self):
+        """Test another user does not get a 304 for someone else's page"""
+        etag = self.client.get(self.car_url)["ETag"]
+        other = get_user_model().objects.create_user(
+            username="other",
+            password="testpass123",
+            license_number="OTH12345"
+        )
+        self.client.force_login(other)
+
+        response = self.client.get(self.car_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_login_keeps_etags(self):
+        """Test logging in, which saves last_login, changes no page"""
+        url = reverse("taxi:driver-list")
+        etag = self.client.get(url)["ETag"]
+
+        self.client.login(username="testuser", password="testpass123")
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
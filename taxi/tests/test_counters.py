@@ -0,0 +1,111 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from taxi import counters
+from taxi.models import Manufacturer, Car
+from taxi.visits import visits
+
+
+class CounterTests(TestCase):
+    """Test cached entity counters"""
+
+    def setUp(self):
+        cache.clear()
+        self.manufacturer = Manufacturer.objects.create(
+            name="Toyota",
+            country="Japan"
+        )
+        self.driver = get_user_model().objects.create_user(
+            username="driver1",
+            password="pass123",
+            license_number="DRV00001"
+        )
+        self.car = Car.objects.create(
+            model="Camry",
+            manufacturer=self.manufacturer
+        )
+
+    def test_counts_cached_after_first_read(self):
+        """Test a second read runs no queries"""
+        self.assertEqual(
+            counters.get_counts("drivers", "cars", "manufacturers"),
+            {"drivers": 1, "cars": 1, "manufacturers": 1}
+        )
+        with self.assertNumQueries(0):
+            counters.get_counts("drivers", "cars", "manufacturers")
+
+    def test_signals_keep_counts_current(self):
+        """Test creates, deletes and assignments adjust cached counts"""
+        counters.get_counts("cars", "manufacturers", "assignments")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Manufacturer.objects.create(name="BMW", country="Germany")
+            Car.objects.create(model="Corolla", manufacturer=self.manufacturer)
+            self.car.drivers.add(self.driver)
+
+        with self.assertNumQueries(0):
+            counts = counters.get_counts(
+                "cars", "manufacturers", "assignments"
+            )
+        self.assertEqual(
+            counts, {"cars": 2, "manufacturers": 2, "assignments": 1}
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.car.drivers.remove(self.driver)
+            self.car.delete()
+
+        self.assertEqual(
+            counters.get_counts("cars", "assignments"),
+            {"cars": 1, "assignments": 0}
+        )
+
+    def test_reconcile_command_fixes_drift(self):
+        """Test reconcile_counters recounts rows written without signals"""
+        counters.get_counts("cars")
+        Car.objects.bulk_create(
+            [Car(model="RAV4", manufacturer=self.manufacturer)]
+        )
+        self.assertEqual(counters.get_counts("cars")["cars"], 1)
+
+        out = StringIO()
+        call_command("reconcile_counters", stdout=out)
+
+        self.assertIn("cars: 2", out.getvalue())
+        self.assertEqual(counters.get_counts("cars")["cars"], 2)
+
+
+class IndexCountersTests(TestCase):
+    """Test the home page reads counts from the cache"""
+
+    def setUp(self):
+        # Visits stay in the process-wide buffer, flush them into
+        # the test database rather than at exit.
+        self.addCleanup(visits.flush)
+        cache.clear()
+        self.client = Client()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.client.force_login(self.user)
+
+    def test_index_runs_no_count_queries(self):
+        """Test a warm home page runs no COUNT(*) queries"""
+        self.client.get(reverse("taxi:index"))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("taxi:index"))
+
+        self.assertEqual(response.context["num_drivers"], 1)
+        self.assertFalse(
+            [q for q in queries if "COUNT(" in q["sql"].upper()]
+        )
@@ -0,0 +1,71 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from taxi_service.database import cache_from_url, database_from_url
+
+
+class DatabaseFromUrlTests(SimpleTestCase):
+    """Test DATABASES entries built from DATABASE_URL"""
+
+    def test_postgres(self):
+        """Test a postgres url gives persistent, health checked connections"""
+        config = database_from_url(
+            "postgres://taxi:p%40ss@db:5433/fleet?sslmode=require",
+            conn_max_age=30,
+        )
+        self.assertEqual(config["ENGINE"], "django.db.backends.postgresql")
+        self.assertEqual(
+            (config["NAME"], config["USER"], config["PASSWORD"]),
+            ("fleet", "taxi", "p@ss"),
+        )
+        self.assertEqual((config["HOST"], config["PORT"]), ("db", "5433"))
+        self.assertEqual(config["CONN_MAX_AGE"], 30)
+        self.assertTrue(config["CONN_HEALTH_CHECKS"])
+        self.assertEqual(config["OPTIONS"], {"sslmode": "require"})
+
+    def test_postgres_pool(self):
+        """Test a pool replaces persistent connections"""
+        config = database_from_url(
+            "postgresql://taxi@db/fleet", conn_max_age=30, pool_size=10
+        )
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+        self.assertEqual(
+            config["OPTIONS"]["pool"], {"min_size": 1, "max_size": 10}
+        )
+
+    def test_sqlite_wal(self):
+        """Test sqlite urls use WAL and immediate transactions"""
+        config = database_from_url("sqlite:////srv/taxi/db.sqlite3")
+        self.assertEqual(config["NAME"], "/srv/taxi/db.sqlite3")
+        self.assertIn("journal_mode=WAL", config["OPTIONS"]["init_command"])
+        self.assertEqual(config["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+
+        config = database_from_url("sqlite:///db.sqlite3")
+        self.assertEqual(config["NAME"], "db.sqlite3")
+
+    def test_unsupported_scheme(self):
+        """Test unknown database and cache schemes are rejected"""
+        with self.assertRaises(ImproperlyConfigured):
+            database_from_url("mysql://taxi@db/fleet")
+        with self.assertRaises(ImproperlyConfigured):
+            cache_from_url("memcached://cache:11211")
+
+    def test_cache(self):
+        """Test a redis url gives a shared cache, no url a local one"""
+        self.assertEqual(
+            cache_from_url("redis://cache:6379/0")["BACKEND"],
+            "taxi.metrics.MeteredRedisCache",
+        )
+        self.assertEqual(
+            cache_from_url(None)["BACKEND"],
+            "taxi.metrics.MeteredLocMemCache",
+        )
+
+    def test_local_cache_needs_one_worker(self):
+        """Test several workers without a shared cache are rejected"""
+        with self.assertRaises(ImproperlyConfigured):
+            cache_from_url(None, workers=4)
+        self.assertEqual(
+            cache_from_url("redis://cache:6379/0", workers=4)["BACKEND"],
+            "taxi.metrics.MeteredRedisCache",
+        )
@@ -1,5 +1,7 @@
 from django.test import TestCase
-from taxi.forms import DriverCreationForm, DriverLicenseUpdateForm
+from django.contrib.auth import get_user_model
+from taxi.forms import CarForm, DriverCreationForm, DriverLicenseUpdateForm
+from taxi.models import Manufacturer
 
 
 class DriverCreationFormTests(TestCase):
@@ -42,3 +44,63 @@ class DriverLicenseUpdateFormTests(TestCase):
         }
         form = DriverLicenseUpdateForm(data=form_data)
         self.assertTrue(form.is_valid())
+
+
+class CarFormDriverPickerTests(TestCase):
+    """Test the car form only loads the selected drivers"""
+
+    def setUp(self):
+        self.manufacturer = Manufacturer.objects.create(
+            name="Toyota",
+            country="Japan"
+        )
+        self.drivers = [
+            get_user_model().objects.create(
+                username=f"driver{number}",
+                license_number=f"DRV0000{number}"
+            )
+            for number in range(5)
+        ]
+
+    def test_renders_only_selected_drivers(self):
+        """Test unselected drivers are not rendered as options"""
+        form = CarForm(
+            initial={"drivers": [self.drivers[1].pk, self.drivers[3].pk]}
+        )
+        html = str(form["drivers"])
+
+        self.assertIn("driver1", html)
+        self.assertIn("driver3", html)
+        self.assertNotIn("driver0", html)
+        self.assertIn('data-lookup-url="/drivers/lookup/"', html)
+
+    def test_selected_drivers_are_separate_checkboxes(self):
+        """Test each selected driver is a checked checkbox of its own"""
+        form = CarForm(
+            initial={"drivers": [self.drivers[1].pk, self.drivers[3].pk]}
+        )
+        html = str(form["drivers"])
+
+        self.assertEqual(html.count('type="checkbox"'), 2)
+        self.assertEqual(html.count("checked"), 2)
+        self.assertIn(f'value="{self.drivers[1].pk}"', html)
+        self.assertIn('data-name="drivers"', html)
+        self.assertNotIn("<select", html)
+
+    def test_empty_form_runs_no_driver_query(self):
+        """Test a blank form does not query drivers"""
+        form = CarForm()
+        with self.assertNumQueries(0):
+            str(form["drivers"])
+
+    def test_valid_with_selected_pks(self):
+        """Test the form validates posted driver pks"""
+        form = CarForm(
+            data={
+                "model": "Camry",
+                "manufacturer": self.manufacturer.pk,
+                "drivers": [self.drivers[0].pk],
+            }
+        )
+        self.assertTrue(form.is_valid())
+        self.assertEqual(list(form.cleaned_data["drivers"]), self.drivers[:1])
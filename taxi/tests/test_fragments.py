@@ -0,0 +1,94 @@
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from taxi.models import Manufacturer, Car
+
+
+class DetailFragmentCacheTests(TestCase):
+    """Test cached detail page fragments are invalidated on change"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.client.force_login(self.user)
+        self.manufacturer = Manufacturer.objects.create(
+            name="Toyota",
+            country="Japan"
+        )
+        self.car = Car.objects.create(
+            model="Camry",
+            manufacturer=self.manufacturer
+        )
+        self.driver = get_user_model().objects.create_user(
+            username="driver1",
+            password="pass123",
+            license_number="DRV00001"
+        )
+        self.car.drivers.add(self.driver)
+        self.car_url = reverse("taxi:car-detail", args=[self.car.pk])
+        self.driver_url = reverse("taxi:driver-detail", args=[self.driver.pk])
+
+    def test_repeat_read_skips_related_query(self):
+        """Test a cached fragment saves the related rows query"""
+        # session, user, car, driver count, drivers
+        with self.assertNumQueries(5):
+            self.client.get(self.car_url)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.car_url)
+        self.assertContains(response, "driver1")
+
+        # session, user, driver, car count, cars
+        with self.assertNumQueries(5):
+            self.client.get(self.driver_url)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.driver_url)
+        self.assertContains(response, "Camry")
+
+    def test_toggle_visible_at_once(self):
+        """Test toggling an assignment updates the cached drivers list"""
+        self.client.get(self.car_url)
+        self.client.get(
+            reverse("taxi:toggle-car-assign", args=[self.car.pk])
+        )
+
+        response = self.client.get(self.car_url)
+        self.assertContains(response, "testuser (")
+
+    def test_car_update_visible_at_once(self):
+        """Test saving the car form updates both detail pages"""
+        self.client.get(self.car_url)
+        self.client.get(self.driver_url)
+
+        self.client.post(
+            reverse("taxi:car-update", args=[self.car.pk]),
+            {
+                "model": "Crown",
+                "manufacturer": self.manufacturer.pk,
+                "drivers": [self.user.pk],
+            }
+        )
+
+        car_page = self.client.get(self.car_url)
+        self.assertContains(car_page, "testuser (")
+        self.assertNotContains(car_page, "driver1")
+        self.assertContains(self.client.get(self.driver_url), "No cars!")
+
+    def test_related_renames_visible_at_once(self):
+        """Test renaming a driver or manufacturer updates the fragments"""
+        self.client.get(self.car_url)
+        self.client.get(self.driver_url)
+
+        self.driver.first_name = "Olena"
+        self.driver.save()
+        self.manufacturer.name = "Lexus"
+        self.manufacturer.save()
+
+        self.assertContains(self.client.get(self.car_url), "Olena")
+        self.assertContains(self.client.get(self.driver_url), "Lexus")
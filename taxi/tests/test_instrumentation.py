@@ -0,0 +1,116 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from taxi.instrumentation import InstrumentationMiddleware, fingerprint
+from taxi.models import Car, Manufacturer
+
+
+class FingerprintTests(TestCase):
+    """Test SQL fingerprints"""
+
+    def test_parameters_are_ignored(self):
+        """Test queries differing only in parameters match"""
+        self.assertEqual(
+            fingerprint('SELECT "id" FROM "taxi_car" WHERE "id" = %s'),
+            fingerprint('SELECT  "id"\nFROM "taxi_car" WHERE "id" = 42'),
+        )
+        self.assertEqual(
+            fingerprint("SELECT 1 FROM t WHERE name = 'O''Neil'"),
+            "SELECT ? FROM t WHERE name = ?",
+        )
+
+    def test_value_lists_collapse(self):
+        """Test IN lists of any length match"""
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s)"),
+            "SELECT * FROM t WHERE id IN (...)",
+        )
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s)"),
+            "SELECT * FROM t WHERE id IN (...)",
+        )
+
+    def test_identifiers_are_kept(self):
+        """Test digits inside names are not replaced"""
+        self.assertEqual(
+            fingerprint('SELECT U0."id" FROM "taxi_car_drivers" U0'),
+            'SELECT U0."id" FROM "taxi_car_drivers" U0',
+        )
+
+
+@override_settings(TAXI_INSTRUMENTATION_SAMPLE_RATE=1)
+class InstrumentationMiddlewareTests(TestCase):
+    """Test sampled requests are reported"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.client.force_login(self.user)
+        manufacturer = Manufacturer.objects.create(
+            name="Toyota",
+            country="Japan"
+        )
+        Car.objects.create(model="Camry", manufacturer=manufacturer)
+
+    def test_report(self):
+        """Test a request is logged and timed in Server-Timing"""
+        with self.assertLogs("taxi.instrumentation", "INFO") as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse("taxi:car-list"))
+
+        report = json.loads(logs.records[0].getMessage())
+        self.assertEqual(report["view"], "taxi:car-list")
+        self.assertEqual(report["status"], 200)
+        self.assertEqual(report["sql_count"], len(queries))
+        self.assertIsNotNone(report["template_ms"])
+        self.assertEqual(report["duplicates"], {})
+
+        self.assertIn("total;dur=", response["Server-Timing"])
+        self.assertIn(
+            f'desc="{len(queries)} queries"', response["Server-Timing"]
+        )
+        self.assertIn("tpl;dur=", response["Server-Timing"])
+
+    def test_duplicates(self):
+        """Test queries repeated in a loop are reported by fingerprint"""
+
+        def view(request):
+            for manufacturer in Manufacturer.objects.all():
+                list(manufacturer.car_set.all())
+            list(Manufacturer.objects.filter(name="Kia"))
+            return HttpResponse()
+
+        Manufacturer.objects.create(name="Kia", country="South Korea")
+        request = RequestFactory().get("/")
+        with self.assertLogs("taxi.instrumentation", "INFO") as logs:
+            InstrumentationMiddleware(view)(request)
+
+        report = json.loads(logs.records[0].getMessage())
+        self.assertEqual(report["sql_count"], 4)
+        self.assertEqual(list(report["duplicates"].values()), [2])
+        self.assertIn("taxi_car", list(report["duplicates"])[0])
+
+    @override_settings(
+        TAXI_INSTRUMENTATION_SAMPLE_RATE=0, TAXI_SERVER_TIMING=True
+    )
+    def test_not_sampled(self):
+        """Test requests outside the sample are not reported"""
+        with self.assertNoLogs("taxi.instrumentation"):
+            response = self.client.get(reverse("taxi:car-list"))
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    @override_settings(TAXI_SERVER_TIMING=False)
+    def test_server_timing_off(self):
+        """Test the header can be turned off"""
+        with self.assertLogs("taxi.instrumentation", "INFO"):
+            response = self.client.get(reverse("taxi:car-list"))
+        self.assertFalse(response.has_header("Server-Timing"))
@@ -0,0 +1,131 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from taxi import counters
+from taxi.metrics import Registry, collect, render
+from taxi.models import Manufacturer
+
+
+class RegistryTests(TestCase):
+    """Test the per-process registry and its text format"""
+
+    def test_counters_and_histograms(self):
+        """Test counters add up and histogram buckets are cumulative"""
+        registry = Registry()
+        registry.inc("taxi_db_queries_total", {"route": "taxi:index"}, 2)
+        registry.inc("taxi_db_queries_total", {"route": "taxi:index"}, 3)
+        registry.observe(
+            "taxi_http_request_duration_seconds", {"route": "taxi:index"}, 0.02
+        )
+        registry.observe(
+            "taxi_http_request_duration_seconds", {"route": "taxi:index"}, 3
+        )
+
+        text = render(registry, {"cars": 7})
+
+        self.assertIn('taxi_db_queries_total{route="taxi:index"} 5', text)
+        self.assertIn(
+            "taxi_http_request_duration_seconds_bucket"
+            '{route="taxi:index",le="0.01"} 0',
+            text,
+        )
+        self.assertIn(
+            "taxi_http_request_duration_seconds_bucket"
+            '{route="taxi:index",le="0.025"} 1',
+            text,
+        )
+        self.assertIn(
+            "taxi_http_request_duration_seconds_bucket"
+            '{route="taxi:index",le="+Inf"} 2',
+            text,
+        )
+        self.assertIn(
+            'taxi_http_request_duration_seconds_count{route="taxi:index"} 2',
+            text,
+        )
+        self.assertIn("# TYPE taxi_cars gauge\ntaxi_cars 7", text)
+
+    def test_processes_are_added_up(self):
+        """Test collect merges the files of every process"""
+        first, second = Registry(), Registry()
+        first.inc("taxi_cache_requests_total", {"result": "hit"})
+        second.inc("taxi_cache_requests_total", {"result": "hit"}, 4)
+        second.observe(
+            "taxi_http_request_duration_seconds", {"route": "taxi:index"}, 0.2
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            directory = Path(directory)
+            with mock.patch("os.getpid", return_value=1):
+                first.flush(directory)
+            with mock.patch("taxi.metrics.registry", second):
+                merged = collect(directory)
+
+        key = ("taxi_cache_requests_total", (("result", "hit"),))
+        self.assertEqual(merged.counters[key], 5)
+        self.assertEqual(len(merged.histograms), 1)
+
+
+class MetricsViewTests(TestCase):
+    """Test the /metrics endpoint"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.client.force_login(self.user)
+        Manufacturer.objects.create(name="Toyota", country="Japan")
+        self.registry = Registry()
+        patcher = mock.patch("taxi.metrics.registry", self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_requests_are_reported(self):
+        """Test routes, queries and cache lookups are counted"""
+        cache.clear()
+        self.client.get(reverse("taxi:manufacturer-list"))
+        self.client.get("/no-such-page/")
+
+        text = self.client.get(reverse("metrics")).content.decode()
+
+        self.assertIn(
+            'taxi_http_requests_total{method="GET",'
+            'route="taxi:manufacturer-list",status="200"} 1',
+            text,
+        )
+        self.assertIn('route="unmatched",status="404"} 1', text)
+        self.assertIn(
+            'taxi_db_queries_total{route="taxi:manufacturer-list"}', text
+        )
+        self.assertIn('taxi_cache_requests_total{result="miss"}', text)
+        self.assertIn("taxi_manufacturers 1", text)
+
+    def test_gauges_do_not_count_rows(self):
+        """Test a scrape reads the cached counts"""
+        counters.reconcile()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 0)
+
+    @override_settings(TAXI_METRICS_FLUSH_INTERVAL=0)
+    def test_registry_is_flushed(self):
+        """Test requests write the process file in TAXI_METRICS_DIR"""
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(TAXI_METRICS_DIR=directory):
+                self.client.get(reverse("taxi:manufacturer-list"))
+                files = list(Path(directory).glob("metrics-*.json"))
+
+        self.assertEqual(len(files), 1)
@@ -0,0 +1,171 @@
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from taxi.models import Manufacturer, Car
+from taxi.pagination import decode_cursor, encode_cursor
+
+
+class CursorTokenTests(TestCase):
+    """Test cursor token encoding"""
+
+    def test_round_trip(self):
+        """Test a token decodes to the values it was made from"""
+        token = encode_cursor(["Tesla", 7], "prev")
+        self.assertEqual(decode_cursor(token), (["Tesla", 7], "prev"))
+
+    def test_invalid_token(self):
+        """Test garbage tokens give 404 instead of a server error"""
+        response = Client().get(reverse("taxi:car-list") + "?cursor=@@@")
+        self.assertEqual(response.status_code, 200)
+
+        with override_settings(TAXI_CURSOR_PAGINATION=True):
+            response = Client().get(
+                reverse("taxi:car-list") + "?cursor=bm90LWpzb24"
+            )
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_values(self):
+        """Test tokens with values of the wrong type give 404"""
+        user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        client = Client()
+        client.force_login(user)
+        urls = [reverse("taxi:driver-lookup"), reverse("taxi:api-car-list")]
+
+        for values in (["abc"], [None], [{}], [[1]]):
+            token = encode_cursor(values, "next")
+            for url in urls:
+                with self.subTest(values=values, url=url):
+                    response = client.get(url, {"cursor": token})
+                    self.assertEqual(response.status_code, 404)
+
+        token = encode_cursor(["1"], "next")
+        response = client.get(urls[0], {"cursor": token})
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(TAXI_CURSOR_PAGINATION=True)
+class CarCursorPaginationTests(TestCase):
+    """Test keyset pagination of the car list"""
+
+    def setUp(self):
+        self.client = Client()
+        self.manufacturer = Manufacturer.objects.create(
+            name="Toyota",
+            country="Japan"
+        )
+        self.cars = [
+            Car.objects.create(
+                model=f"Model {number:02}",
+                manufacturer=self.manufacturer
+            )
+            for number in range(12)
+        ]
+
+    def test_walk_forward_and_back(self):
+        """Test next and prev tokens visit every car exactly once"""
+        url = reverse("taxi:car-list")
+        response = self.client.get(url)
+        pages = [list(response.context["car_list"])]
+
+        while response.context["page_obj"].has_next():
+            token = response.context["page_obj"].next_cursor
+            response = self.client.get(url + f"?cursor={token}")
+            pages.append(list(response.context["car_list"]))
+
+        self.assertEqual(sum(pages, []), self.cars)
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+
+        token = response.context["page_obj"].previous_cursor
+        response = self.client.get(url + f"?cursor={token}")
+        self.assertEqual(list(response.context["car_list"]), pages[1])
+
+        token = response.context["page_obj"].previous_cursor
+        response = self.client.get(url + f"?cursor={token}")
+        self.assertEqual(list(response.context["car_list"]), pages[0])
+        self.assertFalse(response.context["page_obj"].has_previous())
+
+    def test_no_count_query(self):
+        """Test cursor pages do not run COUNT(*)"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("taxi:car-list"))
+
+        self.assertFalse(
+            [q for q in queries if "COUNT(" in q["sql"].upper()]
+        )
+
+    def test_links_keep_search_query(self):
+        """Test next link keeps the search filter"""
+        response = self.client.get(reverse("taxi:car-list") + "?model=model")
+        token = response.context["page_obj"].next_cursor
+        self.assertContains(response, f"?model=model&amp;cursor={token}")
+
+
+@override_settings(TAXI_CURSOR_PAGINATION=True)
+class ManufacturerCursorPaginationTests(TestCase):
+    """Test keyset pagination over the name ordering"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+        for name in ["Kia", "Audi", "Fiat", "BMW", "Seat", "Opel", "Ford"]:
+            Manufacturer.objects.create(name=name, country="EU")
+
+    def test_second_page_follows_name_order(self):
+        """Test second page continues after the last name of the first"""
+        url = reverse("taxi:manufacturer-list")
+        response = self.client.get(url)
+        token = response.context["page_obj"].next_cursor
+        response = self.client.get(url + f"?cursor={token}")
+
+        self.assertEqual(
+            [m.name for m in response.context["manufacturer_list"]],
+            ["Opel", "Seat"]
+        )
+
+
+class OffsetPaginationLinksTests(TestCase):
+    """Test page number links keep the search query"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.client.force_login(self.user)
+        for number in range(6):
+            get_user_model().objects.create_user(
+                username=f"driver{number}",
+                password="pass123",
+                license_number=f"DRV00{number}"
+            )
+
+    def test_driver_list_next_link(self):
+        """Test next link keeps the username filter"""
+        response = self.client.get(
+            reverse("taxi:driver-list") + "?username=driver"
+        )
+        self.assertContains(response, "?username=driver&amp;page=2")
+
+    @override_settings(TAXI_CURSOR_PAGINATION=True)
+    def test_setting_switches_to_cursor_links(self):
+        """Test the setting pages the driver list by cursor"""
+        response = self.client.get(
+            reverse("taxi:driver-list") + "?username=driver"
+        )
+        token = response.context["page_obj"].next_cursor
+        self.assertContains(response, f"?username=driver&amp;cursor={token}")
+        self.assertNotContains(response, "page=2")
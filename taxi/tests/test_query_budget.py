@@ -0,0 +1,100 @@
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth import get_user_model
+
+from taxi.tests.query_budget import (
+    TEMPERATURES,
+    report,
+    route_names,
+    walk,
+)
+from taxi.visits import visits
+
+
+# Maximum number of SQL queries of a GET request per route with an
+# empty cache (cold) and repeated (warm), including the session and
+# user lookups of a logged in client.
+ROUTE_BUDGETS = {
+    "index": (6, 2),
+    "manufacturer-list": (4, 4),
+    "manufacturer-create": (2, 2),
+    "manufacturer-update": (3, 3),
+    "manufacturer-delete": (3, 3),
+    "car-list": (4, 4),
+    "car-export": (3, 3),
+    "car-detail": (5, 3),
+    "car-drivers": (4, 4),
+    "car-create": (3, 3),
+    "car-update": (6, 6),
+    "car-delete": (3, 3),
+    "toggle-car-assign": (6, 9),
+    "car-assignments": (0, 0),
+    "driver-list": (4, 4),
+    "driver-export": (3, 3),
+    "driver-lookup": (3, 3),
+    "driver-detail": (5, 3),
+    "driver-cars": (4, 4),
+    "driver-create": (2, 2),
+    "driver-update": (3, 3),
+    "driver-delete": (3, 3),
+    "api-manufacturer-list": (3, 3),
+    "api-car-list": (3, 3),
+    "api-driver-list": (3, 3),
+    "api-manufacturer-detail": (3, 3),
+    "api-car-detail": (3, 3),
+    "api-driver-detail": (3, 3),
+    "async-manufacturer-list": (4, 4),
+    "async-car-list": (4, 4),
+    "async-car-detail": (5, 3),
+    "async-driver-list": (4, 4),
+    "async-driver-detail": (5, 3),
+}
+
+
+# Visits are flushed on a timer, which would add the flush's queries
+# to whichever request comes due.
+@override_settings(TAXI_VISITS_FLUSH_INTERVAL=3600)
+class QueryBudgetTests(TestCase):
+    """Test every taxi route stays within its query budget"""
+
+    def setUp(self):
+        # Visits stay in the process-wide buffer, flush them into
+        # the test database rather than at exit.
+        self.addCleanup(visits.flush)
+        self.client = Client()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.client.force_login(self.user)
+
+    def test_every_route_has_a_budget(self):
+        """Test new routes get a declared budget"""
+        self.assertEqual(set(route_names()), set(ROUTE_BUDGETS))
+
+    def test_routes_within_budget(self):
+        """Test query counts stay within budget and do not grow"""
+        results = walk(self.client, self.user)
+        summary = report(results)
+
+        for name, by_size in results.items():
+            for index, temperature in enumerate(TEMPERATURES):
+                measured = [
+                    by_temperature[temperature]
+                    for by_temperature in by_size.values()
+                ]
+                counts = {count for status, count, db_time in measured}
+                with self.subTest(route=name, temperature=temperature):
+                    self.assertLess(
+                        max(status for status, _, _ in measured),
+                        500,
+                        summary
+                    )
+                    self.assertLessEqual(
+                        max(counts), ROUTE_BUDGETS[name][index], summary
+                    )
+                    self.assertEqual(
+                        len(counts),
+                        1,
+                        f"{name} {temperature} grows with data\n{summary}"
+                    )
@@ -0,0 +1,145 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from taxi.querystats import QueryStats, QueryStatsMiddleware, read_stats
+
+
+class QueryStatsTests(TestCase):
+    """Test per fingerprint aggregation"""
+
+    def test_queries_are_aggregated_by_fingerprint(self):
+        """Test count, total and max add up per view and fingerprint"""
+        stats = QueryStats()
+        stats.add("taxi:car-list", "SELECT * FROM t WHERE id = %s", 0.25)
+        stats.add("taxi:car-list", "SELECT * FROM t WHERE id = 7", 0.5)
+        stats.add("taxi:driver-list", "SELECT * FROM t WHERE id = %s", 0.1)
+
+        entries = {entry["view"]: entry for entry in stats.entries()}
+        self.assertEqual(
+            entries["taxi:car-list"],
+            {
+                "view": "taxi:car-list",
+                "fingerprint": "SELECT * FROM t WHERE id = ?",
+                "count": 2,
+                "total": 0.75,
+                "max": 0.5,
+            },
+        )
+        self.assertEqual(entries["taxi:driver-list"]["count"], 1)
+
+    @override_settings(TAXI_QUERY_STATS_MAX_ENTRIES=2)
+    def test_cheapest_entry_is_evicted(self):
+        """Test a new fingerprint replaces the one with least time"""
+        stats = QueryStats()
+        stats.add(None, "SELECT a FROM t", 0.3)
+        stats.add(None, "SELECT b FROM t", 0.1)
+        stats.add(None, "SELECT c FROM t", 0.2)
+
+        self.assertEqual(
+            sorted(entry["fingerprint"] for entry in stats.entries()),
+            ["SELECT a FROM t", "SELECT c FROM t"],
+        )
+
+    def test_files_of_processes_are_merged(self):
+        """Test read_stats adds up the files of every process"""
+        first, second = QueryStats(), QueryStats()
+        first.add(None, "SELECT a FROM t", 0.3)
+        second.add(None, "SELECT a FROM t", 0.1)
+        second.add(None, "SELECT a FROM t", 0.4)
+
+        with tempfile.TemporaryDirectory() as directory:
+            directory = Path(directory)
+            with mock.patch("os.getpid", return_value=1):
+                first.flush(directory)
+            with mock.patch("os.getpid", return_value=2):
+                second.flush(directory)
+            entries = read_stats(directory)
+
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["count"], 3)
+        self.assertAlmostEqual(entries[0]["total"], 0.8)
+        self.assertEqual(entries[0]["max"], 0.4)
+
+
+class QueryStatsMiddlewareTests(TestCase):
+    """Test queries of requests are recorded"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.client.force_login(self.user)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.stats = QueryStats()
+        patcher = mock.patch("taxi.querystats.query_stats", self.stats)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_not_used_without_directory(self):
+        """Test the middleware is off unless TAXI_QUERY_STATS_DIR is set"""
+        with self.assertRaises(MiddlewareNotUsed):
+            QueryStatsMiddleware(lambda request: HttpResponse())
+
+    def test_queries_are_recorded_under_the_view(self):
+        """Test each query of a request is added to the statistics"""
+        with override_settings(
+            TAXI_QUERY_STATS_DIR=self.directory.name,
+            TAXI_QUERY_STATS_FLUSH_INTERVAL=0,
+        ):
+            self.client.get(reverse("taxi:car-list"))
+
+        views = {entry["view"] for entry in self.stats.entries()}
+        self.assertIn("taxi:car-list", views)
+        self.assertEqual(
+            {entry["view"] for entry in read_stats(self.directory.name)},
+            views,
+        )
+
+    def test_slow_queries_are_logged(self):
+        """Test queries over TAXI_SLOW_QUERY_MS are logged"""
+        with override_settings(
+            TAXI_QUERY_STATS_DIR=self.directory.name, TAXI_SLOW_QUERY_MS=0
+        ):
+            with self.assertLogs("taxi.querystats", "WARNING") as logs:
+                self.client.get(reverse("taxi:car-list"))
+
+        report = json.loads(logs.records[0].getMessage())
+        self.assertEqual(report["view"], "taxi:car-list")
+        self.assertIn("SELECT", report["fingerprint"])
+
+
+class QueryStatsCommandTests(TestCase):
+    """Test the query_stats command"""
+
+    def test_top_queries_are_printed(self):
+        """Test entries are sorted and limited"""
+        stats = QueryStats()
+        stats.add("taxi:car-list", "SELECT a FROM t", 0.1)
+        stats.add("taxi:car-list", "SELECT a FROM t", 0.1)
+        stats.add("taxi:driver-list", "SELECT b FROM t", 0.5)
+
+        with tempfile.TemporaryDirectory() as directory:
+            stats.flush(Path(directory))
+            out = StringIO()
+            call_command(
+                "query_stats", "--dir", directory, "--sort", "count",
+                "--limit", "1", stdout=out,
+            )
+
+        output = out.getvalue()
+        self.assertIn("SELECT a FROM t", output)
+        self.assertNotIn("SELECT b FROM t", output)
+        self.assertIn("taxi:car-list", output)
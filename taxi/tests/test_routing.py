@@ -0,0 +1,182 @@
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from taxi import counters
+from taxi.models import Car, Manufacturer
+from taxi.routing import (
+    STICKY_COOKIE,
+    ReplicaRouter,
+    ReplicaRoutingMiddleware,
+    read_alias,
+    use_primary,
+)
+from taxi.versions import BUMPED_PREFIX
+
+
+@override_settings(TAXI_READ_REPLICAS=["replica1", "replica2"])
+class ReplicaRoutingTests(SimpleTestCase):
+    """Test reads of safe requests are routed to replicas"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        self.seen = []
+
+    def view(self, request):
+        self.seen.append(self.router.db_for_read(Car))
+        self.seen.append(self.router.db_for_read(Session))
+        return HttpResponse()
+
+    def call(self, request, view=None):
+        return ReplicaRoutingMiddleware(view or self.view)(request)
+
+    def test_get_reads_from_a_replica(self):
+        """Test a GET reads from one replica and sets no cookie"""
+        response = self.call(self.factory.get("/cars/"))
+
+        self.assertIn(self.seen[0], ["replica1", "replica2"])
+        self.assertEqual(self.seen[1], "default")
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_write_makes_client_sticky(self):
+        """Test a POST uses the primary and sets the sticky cookie"""
+        response = self.call(self.factory.post("/cars/create/"))
+
+        self.assertEqual(self.seen[0], "default")
+        self.assertEqual(response.cookies[STICKY_COOKIE]["max-age"], 10)
+
+        request = self.factory.get("/cars/")
+        request.COOKIES[STICKY_COOKIE] = "1"
+        self.call(request)
+        self.assertEqual(self.seen[2], "default")
+
+    def test_use_primary(self):
+        """Test a view marked use_primary writes on GET safely"""
+        response = self.call(self.factory.get("/"), use_primary(self.view))
+
+        self.assertEqual(self.seen[0], "default")
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+    def test_outside_requests_use_primary(self):
+        """Test management commands and shells read from the primary"""
+        self.assertEqual(self.router.db_for_read(Car), "default")
+
+    def test_instance_hint(self):
+        """Test related rows are read where the instance was loaded"""
+        car = Car(pk=1)
+        car._state.db = "replica2"
+        self.assertEqual(
+            self.router.db_for_read(Car, instance=car), "replica2"
+        )
+
+    def test_writes_and_migrations(self):
+        """Test writes and migrations only touch the primary"""
+        self.assertEqual(self.router.db_for_write(Car), "default")
+        self.assertFalse(self.router.allow_migrate("replica1", "taxi"))
+        self.assertTrue(self.router.allow_migrate("default", "taxi"))
+
+    @override_settings(TAXI_READ_REPLICAS=[])
+    def test_no_replicas(self):
+        """Test nothing changes when no replicas are configured"""
+        response = self.call(self.factory.post("/cars/create/"))
+
+        self.assertEqual(self.seen[0], "default")
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+
+LAGGING = "lagging"
+
+
+@override_settings(TAXI_READ_REPLICAS=[LAGGING])
+class LaggingReplicaTests(TestCase):
+    """Test what is cached after a write is not read from a replica"""
+
+    @classmethod
+    def setUpClass(cls):
+        # A replica of its own that never receives the writes. Added
+        # here, the test runner only sets up the configured databases.
+        cls.databases = {"default", LAGGING}
+        connections.settings[LAGGING] = {
+            **connections["default"].settings_dict,
+            "NAME": "file:lagging?mode=memory&cache=shared",
+        }
+        with override_settings(TAXI_READ_REPLICAS=[]):
+            call_command("migrate", database=LAGGING, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[LAGGING].close()
+        del connections[LAGGING]
+        del connections.settings[LAGGING]
+
+    def setUp(self):
+        for alias in ("default", LAGGING):
+            self.driver = get_user_model().objects.db_manager(
+                alias
+            ).create_user(
+                id=1,
+                username="testuser",
+                password="testpass123",
+                license_number="TEST123"
+            )
+            manufacturer = Manufacturer.objects.using(alias).create(
+                id=1, name="Toyota", country="Japan"
+            )
+            self.car = Car.objects.using(alias).create(
+                id=1, model="Camry", manufacturer=manufacturer
+            )
+        cache.clear()
+        self.client.force_login(self.driver)
+        self.url = reverse("taxi:car-detail", args=[self.car.pk])
+
+    def test_fragment_after_write_is_read_from_primary(self):
+        """Test another client's change is rendered and cached at once"""
+        self.assertContains(self.client.get(self.url), "0 assigned")
+
+        # The replica never sees the assignment.
+        self.car.drivers.add(self.driver)
+        response = self.client.get(self.url)
+        self.assertContains(response, "1 assigned")
+        etag = response["ETag"]
+
+        # Once the replica caught up the cached fragment is served.
+        cache.delete_many(
+            [f"{BUMPED_PREFIX}{name}" for name in ("car:1", "driver:1")]
+        )
+        response = self.client.get(self.url)
+        self.assertContains(response, "1 assigned")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_unchanged_pages_read_from_replica(self):
+        """Test pages without a recent write still use the replica"""
+        Car.objects.using(LAGGING).filter(pk=self.car.pk).update(
+            model="Lagging"
+        )
+        self.assertContains(self.client.get(self.url), "Lagging")
+
+    def test_recount_after_write_is_read_from_primary(self):
+        """Test a count dropped by a write is not recounted on a replica"""
+        self.car.drivers.add(self.driver)
+        cache.delete(counters.KEY_PREFIX + "assignments")
+
+        token = read_alias.set(LAGGING)
+        try:
+            counts = counters.get_counts("assignments")
+        finally:
+            read_alias.reset(token)
+
+        self.assertEqual(counts, {"assignments": 1})
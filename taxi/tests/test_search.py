@@ -1,7 +1,10 @@
-from django.test import TestCase, Client
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from taxi.models import Manufacturer, Car
+from taxi.search import SQLiteTrigramSearch, get_search_backend
 
 
 class DriverSearchTests(TestCase):
@@ -217,3 +220,85 @@ class ManufacturerSearchTests(TestCase):
         self.assertEqual(response.status_code, 200)
         manufacturers = response.context["manufacturer_list"]
         self.assertEqual(len(manufacturers), 3)
+
+
+class SearchBackendTests(TestCase):
+    """Test the indexed search backend matches icontains"""
+
+    def setUp(self):
+        self.manufacturer = Manufacturer.objects.create(
+            name="Toyota",
+            country="Japan"
+        )
+        for model in [
+            "Camry", "Corolla", "RAV4", "Land Cruiser",
+            "100% Electric", "bZ4X", 'Model "Q"', "Yaris_GR",
+        ]:
+            Car.objects.create(model=model, manufacturer=self.manufacturer)
+
+    def assert_same_as_icontains(self, term):
+        expected = Car.objects.filter(model__icontains=term)
+        found = get_search_backend().filter(Car.objects.all(), "model", term)
+        self.assertQuerySetEqual(
+            found.order_by("id"), expected.order_by("id"), ordered=True
+        )
+
+    def test_default_backend_on_sqlite(self):
+        """Test SQLite uses the trigram index backend"""
+        if connection.vendor == "sqlite":
+            self.assertIsInstance(get_search_backend(), SQLiteTrigramSearch)
+
+    def test_results_match_icontains(self):
+        """Test results are identical to icontains for tricky terms"""
+        for term in [
+            "co", "COR", "roll", "and cr", "0% e", "%", "_", "s_g",
+            '"q"', "x", "zzz", "4",
+        ]:
+            with self.subTest(term=term):
+                self.assert_same_as_icontains(term)
+
+    def test_index_follows_updates_and_deletes(self):
+        """Test renamed and deleted rows are reindexed"""
+        car = Car.objects.get(model="Camry")
+        car.model = "Crown"
+        car.save()
+        Car.objects.filter(model="Corolla").delete()
+        Car.objects.bulk_create(
+            [Car(model="Camry Hybrid", manufacturer=self.manufacturer)]
+        )
+
+        for term in ["camry", "crown", "corolla", "hybrid"]:
+            with self.subTest(term=term):
+                self.assert_same_as_icontains(term)
+
+    def test_list_view_uses_index(self):
+        """Test the car list query goes through the search index"""
+        if connection.vendor != "sqlite":
+            self.skipTest("FTS5 index is SQLite only")
+
+        with CaptureQueriesContext(connection) as queries:
+            Client().get(reverse("taxi:car-list") + "?model=cam")
+
+        self.assertTrue([q for q in queries if "MATCH" in q["sql"]])
+
+    @override_settings(TAXI_SEARCH_BACKEND="taxi.search.SubstringSearch")
+    def test_backend_setting(self):
+        """Test TAXI_SEARCH_BACKEND selects the backend"""
+        self.assertNotIsInstance(get_search_backend(), SQLiteTrigramSearch)
+
+    def test_rebuilt_table_falls_back_to_icontains(self):
+        """Test rows written after the triggers are gone are found"""
+        if connection.vendor != "sqlite":
+            self.skipTest("FTS5 index is SQLite only")
+
+        # What a migration rebuilding taxi_car does to the triggers.
+        with connection.cursor() as cursor:
+            for suffix in ("ai", "ad", "au"):
+                cursor.execute(f"DROP TRIGGER taxi_car_model_search_{suffix}")
+        Car.objects.create(
+            model="Corolla Cross", manufacturer=self.manufacturer
+        )
+
+        for term in ["cross", "corolla", "camry"]:
+            with self.subTest(term=term):
+                self.assert_same_as_icontains(term)
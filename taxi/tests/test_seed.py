@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from taxi.forms import validate_license_number
+from taxi.models import Car, Driver, Manufacturer
+from taxi.seed import license_number
+
+
+class LicenseNumberTests(TestCase):
+    """Test generated license numbers"""
+
+    def test_license_numbers_valid_and_unique(self):
+        """Test license numbers pass validation and do not repeat"""
+        numbers = [0, 1, 99999, 100000, 2600000, 1757599999]
+        licenses = [license_number(number) for number in numbers]
+
+        for value in licenses:
+            self.assertEqual(validate_license_number(value), value)
+        self.assertEqual(len(set(licenses)), len(licenses))
+
+
+class SeedFleetCommandTests(TestCase):
+    """Test the seed_fleet management command"""
+
+    def seed(self):
+        call_command(
+            "seed_fleet",
+            "--manufacturers=3",
+            "--drivers=20",
+            "--cars=50",
+            "--drivers-per-car=2",
+            "--batch-size=7",
+            "--seed=5",
+            stdout=StringIO(),
+        )
+        return list(
+            Car.objects.order_by("id").values_list(
+                "model", "manufacturer__name"
+            )
+        )
+
+    def test_creates_requested_rows(self):
+        """Test the fleet has the requested size and assignments"""
+        self.seed()
+
+        self.assertEqual(Manufacturer.objects.count(), 3)
+        self.assertEqual(Driver.objects.count(), 20)
+        self.assertEqual(Car.objects.count(), 50)
+        self.assertEqual(Car.drivers.through.objects.count(), 100)
+        for value in Driver.objects.values_list("license_number", flat=True):
+            validate_license_number(value)
+
+    def test_same_seed_same_fleet(self):
+        """Test a fixed seed reproduces the same data"""
+        first = self.seed()
+        Car.objects.all().delete()
+        Manufacturer.objects.all().delete()
+        Driver.objects.all().delete()
+
+        self.assertEqual(self.seed(), first)
+
+    def test_second_run_adds_rows(self):
+        """Test running again adds rows instead of colliding"""
+        self.seed()
+        self.seed()
+
+        self.assertEqual(Driver.objects.count(), 40)
+        self.assertEqual(Car.objects.count(), 100)
+
+    def test_run_after_deletes_adds_rows(self):
+        """Test running again after deletes does not reuse numbers"""
+        self.seed()
+        Driver.objects.filter(
+            pk__in=Driver.objects.order_by("id").values("pk")[3:5]
+        ).delete()
+        Manufacturer.objects.order_by("id").first().delete()
+        self.seed()
+
+        self.assertEqual(Driver.objects.count(), 38)
+        self.assertEqual(Manufacturer.objects.count(), 5)
@@ -0,0 +1,266 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from taxi.models import Manufacturer, Car
+from taxi.transfer import Assignment, export_rows, import_rows, write_rows
+
+
+class ImportTests(TestCase):
+    """Test streaming fleet imports"""
+
+    def setUp(self):
+        self.driver1 = get_user_model().objects.create_user(
+            username="driver1",
+            password="pass123",
+            license_number="DRV00001"
+        )
+        self.driver2 = get_user_model().objects.create_user(
+            username="driver2",
+            password="pass123",
+            license_number="DRV00002"
+        )
+
+    def test_import_manufacturers_skips_existing(self):
+        """Test existing manufacturer names are not duplicated"""
+        Manufacturer.objects.create(name="BMW", country="Germany")
+        stream = StringIO("name,country\nBMW,Germany\nKia,South Korea\n")
+
+        result = import_rows("manufacturers", stream, "csv")
+
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(Manufacturer.objects.count(), 2)
+
+    def test_import_cars_with_drivers(self):
+        """Test cars are created with their driver assignments"""
+        Manufacturer.objects.create(name="Toyota", country="Japan")
+        stream = StringIO(
+            '{"model": "Camry", "manufacturer": "Toyota", '
+            '"drivers": ["driver1", "driver2"]}\n'
+            '{"model": "Prius", "manufacturer": "Toyota", "drivers": []}\n'
+            '{"model": "X5", "manufacturer": "BMW", "drivers": []}\n'
+        )
+
+        result = import_rows("cars", stream, "jsonl", batch_size=2)
+
+        self.assertEqual(result.imported, 2)
+        self.assertEqual(result.errors, ["row 3: unknown manufacturer BMW"])
+        camry = Car.objects.get(model="Camry")
+        self.assertEqual(
+            set(camry.drivers.all()), {self.driver1, self.driver2}
+        )
+
+    def test_import_assignments_reports_unknown_rows(self):
+        """Test bad assignment rows are rejected and the rest imported"""
+        car = Car.objects.create(
+            model="Camry",
+            manufacturer=Manufacturer.objects.create(
+                name="Toyota", country="Japan"
+            )
+        )
+        stream = StringIO(
+            f"car,driver\n{car.pk},driver1\n{car.pk},nobody\nx,driver2\n"
+        )
+
+        result = import_rows("assignments", stream, "csv")
+
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(len(result.errors), 2)
+        self.assertEqual(list(car.drivers.all()), [self.driver1])
+
+    def test_import_cars_keeps_ids(self):
+        """Test cars keep their id and existing ids are skipped"""
+        toyota = Manufacturer.objects.create(name="Toyota", country="Japan")
+        car = Car.objects.create(model="Camry", manufacturer=toyota)
+        stream = StringIO(
+            f"id,model,manufacturer,drivers\n"
+            f"{car.pk},Camry,Toyota,\n"
+            f"{car.pk + 10},Prius,Toyota,driver1\n"
+            f",Yaris,Toyota,\n"
+            f"x,RAV4,Toyota,\n"
+        )
+
+        result = import_rows("cars", stream, "csv")
+
+        self.assertEqual(result.imported, 2)
+        self.assertEqual(result.errors, ["row 4: invalid id x"])
+        prius = Car.objects.get(pk=car.pk + 10)
+        self.assertEqual(prius.model, "Prius")
+        self.assertEqual(list(prius.drivers.all()), [self.driver1])
+        self.assertGreater(Car.objects.get(model="Yaris").pk, prius.pk)
+
+    def test_malformed_rows_are_reported(self):
+        """Test malformed lines and missing fields reject only their row"""
+        Manufacturer.objects.create(name="Toyota", country="Japan")
+        stream = StringIO(
+            '{"model": "Camry", "manufacturer": "Toyota"}\n'
+            '{"model": "Prius", \n'
+            '["Yaris", "Toyota"]\n'
+            '{"model": "RAV4"}\n'
+            '{"manufacturer": "Toyota", "model": ""}\n'
+            '{"model": "Corolla", "manufacturer": "Toyota"}\n'
+        )
+
+        result = import_rows("cars", stream, "jsonl", batch_size=2)
+
+        self.assertEqual(result.imported, 2)
+        self.assertEqual(
+            result.errors,
+            [
+                "row 2: malformed row",
+                "row 3: malformed row",
+                "row 4: missing manufacturer",
+                "row 5: missing model",
+            ],
+        )
+
+    def test_values_of_wrong_type_are_reported(self):
+        """Test values that are not text or ids reject only their row"""
+        Manufacturer.objects.create(name="Toyota", country="Japan")
+        stream = StringIO(
+            '{"model": "Camry", "manufacturer": ["Toyota"]}\n'
+            '{"model": ["Camry"], "manufacturer": "Toyota"}\n'
+            '{"id": 1.5, "model": "Camry", "manufacturer": "Toyota"}\n'
+            '{"id": true, "model": "Camry", "manufacturer": "Toyota"}\n'
+            '{"model": "Camry", "manufacturer": "Toyota", "drivers": [1]}\n'
+            '{"model": "Camry", "manufacturer": "Toyota", "drivers": 1}\n'
+            '{"id": "7", "model": "Prius", "manufacturer": "Toyota"}\n'
+        )
+
+        result = import_rows("cars", stream, "jsonl")
+
+        self.assertEqual(
+            result.errors,
+            [
+                "row 1: invalid manufacturer",
+                "row 2: invalid model",
+                "row 3: invalid id 1.5",
+                "row 4: invalid id True",
+                "row 5: invalid drivers",
+                "row 6: invalid drivers",
+            ],
+        )
+        self.assertEqual(
+            list(Car.objects.values_list("id", "model")), [(7, "Prius")]
+        )
+
+    def test_values_too_long_are_reported(self):
+        """Test values longer than their column reject only their row"""
+        long_name = "x" * 256
+        stream = StringIO(
+            f'{{"name": "{long_name}"}}\n'
+            f'{{"name": "Kia", "country": "{long_name}"}}\n'
+            '{"name": ["Kia"]}\n'
+            '{"name": "Kia", "country": "South Korea"}\n'
+        )
+
+        result = import_rows("manufacturers", stream, "jsonl")
+
+        self.assertEqual(
+            result.errors,
+            [
+                "row 1: name longer than 255 characters",
+                "row 2: country longer than 255 characters",
+                "row 3: invalid name",
+            ],
+        )
+        self.assertEqual(
+            list(Manufacturer.objects.values_list("name", flat=True)),
+            ["Kia"],
+        )
+
+    def test_manufacturers_without_name_are_reported(self):
+        """Test manufacturer rows without a name are rejected"""
+        stream = StringIO("name,country\n,Japan\nKia,South Korea\n")
+
+        result = import_rows("manufacturers", stream, "csv")
+
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(result.errors, ["row 1: missing name"])
+
+
+class ExportTests(TestCase):
+    """Test streaming fleet exports"""
+
+    def setUp(self):
+        self.driver = get_user_model().objects.create_user(
+            username="driver1",
+            password="pass123",
+            license_number="DRV00001"
+        )
+        self.manufacturer = Manufacturer.objects.create(
+            name="Toyota",
+            country="Japan"
+        )
+        self.car = Car.objects.create(
+            model="Camry",
+            manufacturer=self.manufacturer
+        )
+        self.car.drivers.add(self.driver)
+        Car.objects.create(model="Prius", manufacturer=self.manufacturer)
+
+    def test_export_cars_csv(self):
+        """Test cars are exported with space separated drivers"""
+        stream = StringIO()
+        write_rows("cars", export_rows("cars", batch_size=1), stream, "csv")
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(lines[0], "id,model,manufacturer,drivers")
+        self.assertEqual(lines[1], f"{self.car.pk},Camry,Toyota,driver1")
+        self.assertTrue(lines[2].endswith(",Prius,Toyota,"))
+
+    def test_round_trip_through_commands(self):
+        """Test an exported fleet imports back into an empty database"""
+        with tempfile.TemporaryDirectory() as directory:
+            for kind in ("manufacturers", "cars"):
+                call_command(
+                    "export_fleet",
+                    kind,
+                    os.path.join(directory, f"{kind}.jsonl")
+                )
+
+            Car.objects.all().delete()
+            Manufacturer.objects.all().delete()
+
+            for kind in ("manufacturers", "cars"):
+                call_command(
+                    "import_fleet",
+                    kind,
+                    os.path.join(directory, f"{kind}.jsonl"),
+                    stdout=StringIO(),
+                )
+
+        self.assertEqual(
+            sorted(Car.objects.values_list("model", "manufacturer__name")),
+            [("Camry", "Toyota"), ("Prius", "Toyota")]
+        )
+        self.assertEqual(
+            list(Car.objects.get(model="Camry").drivers.all()), [self.driver]
+        )
+
+    def test_round_trip_keeps_assignments(self):
+        """Test exported cars and assignments import back unchanged"""
+        cars = sorted(Car.objects.values_list("id", "model"))
+        assignments = list(Assignment.objects.values_list("car", "driver"))
+        files = {}
+        for kind in ("manufacturers", "cars", "assignments"):
+            files[kind] = StringIO()
+            write_rows(kind, export_rows(kind), files[kind], "csv")
+
+        Car.objects.all().delete()
+        Manufacturer.objects.all().delete()
+
+        for kind in ("manufacturers", "cars", "assignments"):
+            files[kind].seek(0)
+            result = import_rows(kind, files[kind], "csv")
+            self.assertEqual(result.errors, [], kind)
+
+        self.assertEqual(sorted(Car.objects.values_list("id", "model")), cars)
+        self.assertEqual(
+            list(Assignment.objects.values_list("car", "driver")),
+            assignments,
+        )
@@ -1,7 +1,44 @@
+import json
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.models.signals import m2m_changed
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from taxi.models import Manufacturer, Car
+from taxi.visits import visits
+
+
+Assignment = Car.drivers.through
+
+
+@contextmanager
+def concurrent_insert(after, car_id, driver_id):
+    """
+    Insert an assignment right after the first query containing
+    `after`, as a concurrent request would, and collect the
+    m2m_changed actions sent meanwhile.
+    """
+    actions = []
+    done = []
+
+    def insert(execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        if after in sql and not done:
+            done.append(True)
+            Assignment.objects.create(car_id=car_id, driver_id=driver_id)
+        return result
+
+    def receiver(action, pk_set, **kwargs):
+        actions.append((action, pk_set))
+
+    m2m_changed.connect(receiver, sender=Assignment)
+    try:
+        with connection.execute_wrapper(insert):
+            yield actions
+    finally:
+        m2m_changed.disconnect(receiver, sender=Assignment)
 
 
 class PublicViewsTests(TestCase):
@@ -160,6 +197,9 @@ class IndexViewTest(TestCase):
     """Test index view"""
 
     def setUp(self):
+        # Visits stay in the process-wide buffer, flush them into
+        # the test database rather than at exit.
+        self.addCleanup(visits.flush)
         self.client = Client()
         self.user = get_user_model().objects.create_user(
             username="testuser",
@@ -182,3 +222,420 @@ class IndexViewTest(TestCase):
         self.assertIn("num_drivers", response.context)
         self.assertIn("num_cars", response.context)
         self.assertIn("num_manufacturers", response.context)
+
+
+class ToggleAssignToCarTests(TestCase):
+    """Test assigning the logged in driver to a car"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.client.force_login(self.user)
+        self.manufacturer = Manufacturer.objects.create(
+            name="Toyota",
+            country="Japan"
+        )
+        self.car = Car.objects.create(
+            model="Camry",
+            manufacturer=self.manufacturer
+        )
+        self.url = reverse("taxi:toggle-car-assign", args=[self.car.pk])
+
+    def test_toggle_assigns_and_unassigns(self):
+        """Test toggling twice adds then removes the driver"""
+        response = self.client.get(self.url)
+        self.assertRedirects(
+            response, reverse("taxi:car-detail", args=[self.car.pk])
+        )
+        self.assertIn(self.user, self.car.drivers.all())
+
+        self.client.get(self.url)
+        self.assertNotIn(self.user, self.car.drivers.all())
+
+    def test_toggle_query_count(self):
+        """Test toggling runs a constant number of queries"""
+        # session, user, car, savepoint, delete, savepoint, insert,
+        # release, release
+        with self.assertNumQueries(9):
+            self.client.get(self.url)
+
+        # session, user, car, savepoint, delete, release
+        with self.assertNumQueries(6):
+            self.client.get(self.url)
+
+    def test_concurrent_toggle_sends_no_signal(self):
+        """Test a row inserted by a racing toggle is not counted twice"""
+        with concurrent_insert(
+            'DELETE FROM "taxi_car_drivers"', self.car.pk, self.user.pk
+        ) as actions:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(self.car.drivers.all()), [self.user])
+        self.assertEqual(actions, [])
+
+    def test_toggle_unknown_car(self):
+        """Test toggling a missing car gives 404"""
+        response = self.client.get(
+            reverse("taxi:toggle-car-assign", args=[self.car.pk + 1])
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class BatchAssignDriversTests(TestCase):
+    """Test the batch car-driver assignment endpoint"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.other = get_user_model().objects.create_user(
+            username="other",
+            password="testpass123",
+            license_number="OTH12345"
+        )
+        self.client.force_login(self.user)
+        manufacturer = Manufacturer.objects.create(
+            name="Toyota",
+            country="Japan"
+        )
+        self.car = Car.objects.create(model="Camry", manufacturer=manufacturer)
+        self.car.drivers.add(self.other)
+        self.url = reverse("taxi:car-assignments")
+
+    def post(self, operations):
+        return self.client.post(
+            self.url,
+            json.dumps({"operations": operations}),
+            content_type="application/json",
+        )
+
+    def test_operations_are_applied_in_order(self):
+        """Test each operation gets a status and the net change is saved"""
+        car, user, other = self.car.pk, self.user.pk, self.other.pk
+        response = self.post(
+            [
+                {"op": "add", "car": car, "driver": user},
+                {"op": "add", "car": car, "driver": user},
+                {"op": "remove", "car": car, "driver": other},
+                {"op": "remove", "car": car, "driver": other},
+                {"op": "add", "car": car + 1, "driver": user},
+                {"op": "add", "car": car, "driver": other + 100},
+                {"op": "swap", "car": car, "driver": user},
+            ]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["status"] for result in response.json()["results"]],
+            [
+                "added",
+                "unchanged",
+                "removed",
+                "unchanged",
+                "error",
+                "error",
+                "error",
+            ],
+        )
+        self.assertEqual(list(self.car.drivers.all()), [self.user])
+
+    def test_query_count_does_not_grow_with_operations(self):
+        """Test many operations run a constant number of queries"""
+        drivers = get_user_model().objects.bulk_create(
+            get_user_model()(
+                username=f"driver{number}",
+                license_number=f"DRV{number:05}",
+            )
+            for number in range(50)
+        )
+        operations = [
+            {"op": "add", "car": self.car.pk, "driver": driver.pk}
+            for driver in drivers
+        ]
+        operations.append(
+            {"op": "remove", "car": self.car.pk, "driver": self.other.pk}
+        )
+
+        # session, user, savepoint, cars, drivers, assignments,
+        # savepoint, insert, release, delete, release
+        with self.assertNumQueries(11):
+            response = self.post(operations)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.car.drivers.count(), 50)
+
+    def test_booleans_are_not_ids(self):
+        """Test true and false are rejected instead of read as 1 and 0"""
+        response = self.post(
+            [
+                {"op": "add", "car": True, "driver": self.user.pk},
+                {"op": "add", "car": self.car.pk, "driver": False},
+            ]
+        )
+
+        self.assertEqual(
+            [result["status"] for result in response.json()["results"]],
+            ["error", "error"],
+        )
+        self.assertEqual(list(self.car.drivers.all()), [self.other])
+
+    def test_concurrent_insert_sends_no_signal(self):
+        """Test pairs a racing request inserted first are not counted"""
+        car, user, other = self.car.pk, self.user.pk, self.other.pk
+        self.car.drivers.remove(self.other)
+        with concurrent_insert(
+            'FROM "taxi_car_drivers"', car, user
+        ) as actions:
+            response = self.post(
+                [
+                    {"op": "add", "car": car, "driver": user},
+                    {"op": "add", "car": car, "driver": other},
+                ]
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(self.car.drivers.all()), {self.user, self.other}
+        )
+        self.assertEqual(
+            actions, [("post_add", {other})]
+        )
+
+    def test_malformed_payload(self):
+        """Test a body without an operations list gives 400"""
+        for body in ("not json", "[]", '{"operations": {}}'):
+            response = self.client.post(
+                self.url, body, content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_get_not_allowed(self):
+        """Test the endpoint only accepts POST"""
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+
+class CarDetailViewTests(TestCase):
+    """Test the car detail page"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.client.force_login(self.user)
+        self.manufacturer = Manufacturer.objects.create(
+            name="Toyota",
+            country="Japan"
+        )
+        self.car = Car.objects.create(
+            model="Camry",
+            manufacturer=self.manufacturer
+        )
+        self.url = reverse("taxi:car-detail", args=[self.car.pk])
+
+    def test_assign_button_follows_assignment(self):
+        """Test the button offers to assign or unassign the viewer"""
+        self.assertContains(self.client.get(self.url), "Assign me")
+
+        self.car.drivers.add(self.user)
+        response = self.client.get(self.url)
+
+        self.assertContains(response, "Delete me from this car")
+        self.assertContains(response, "testuser")
+
+    def test_query_count_does_not_grow_with_drivers(self):
+        """Test the page cost is the same for one or many drivers"""
+        self.car.drivers.add(self.user)
+        # session, user, car with manufacturer and assignment,
+        # driver count, first page of drivers
+        with self.assertNumQueries(5):
+            self.client.get(self.url)
+
+        for number in range(10):
+            self.car.drivers.add(
+                get_user_model().objects.create(
+                    username=f"driver{number}",
+                    license_number=f"DRV0000{number}"
+                )
+            )
+        self.user.cars.add(
+            Car.objects.create(model="Prius", manufacturer=self.manufacturer)
+        )
+        with self.assertNumQueries(5):
+            self.client.get(self.url)
+
+    def test_drivers_are_paged(self):
+        """Test only the first page is rendered, the rest load on demand"""
+        get_user_model().objects.bulk_create(
+            get_user_model()(
+                username=f"driver{number:02}",
+                license_number=f"DRV000{number:02}",
+            )
+            for number in range(25)
+        )
+        self.car.drivers.set(get_user_model().objects.all())
+
+        response = self.client.get(self.url)
+        self.assertContains(response, "26 assigned")
+        self.assertEqual(len(response.context["drivers"]), 20)
+        cursor = response.context["drivers"].next_cursor
+        more_url = reverse("taxi:car-drivers", args=[self.car.pk])
+        self.assertContains(response, f"{more_url}?cursor={cursor}")
+
+        response = self.client.get(more_url, {"cursor": cursor})
+        self.assertContains(response, "<li>", count=6)
+        self.assertContains(response, "driver24")
+        self.assertNotContains(response, "Load more")
+
+    def test_drivers_page_of_missing_car(self):
+        """Test the drivers page of an unknown car gives 404"""
+        response = self.client.get(
+            reverse("taxi:car-drivers", args=[self.car.pk + 1])
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class DriverDetailViewTests(TestCase):
+    """Test the driver detail page"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.client.force_login(self.user)
+        self.manufacturer = Manufacturer.objects.create(
+            name="Toyota",
+            country="Japan"
+        )
+        self.url = reverse("taxi:driver-detail", args=[self.user.pk])
+
+    def test_cars_are_paged(self):
+        """Test queries stay constant and only a page of cars is shown"""
+        self.assertContains(self.client.get(self.url), "No cars!")
+
+        self.user.cars.set(
+            Car.objects.bulk_create(
+                Car(model=f"Model {number:02}", manufacturer=self.manufacturer)
+                for number in range(25)
+            )
+        )
+
+        # session, user, driver, car count, first page of cars
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url)
+
+        self.assertContains(response, "25 assigned")
+        self.assertContains(response, "Model 19")
+        self.assertNotContains(response, "Model 20")
+
+        cursor = response.context["cars"].next_cursor
+        response = self.client.get(
+            reverse("taxi:driver-cars", args=[self.user.pk]),
+            {"cursor": cursor},
+        )
+        self.assertContains(response, "Model 24")
+        self.assertNotContains(response, "Model 19")
+        self.assertNotContains(response, "Load more")
+
+
+class CsvExportViewsTests(TestCase):
+    """Test the streaming CSV exports"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.client.force_login(self.user)
+        self.manufacturer = Manufacturer.objects.create(
+            name="Toyota",
+            country="Japan"
+        )
+        self.car1 = Car.objects.create(
+            model="Camry",
+            manufacturer=self.manufacturer
+        )
+        self.car2 = Car.objects.create(
+            model="Corolla",
+            manufacturer=self.manufacturer
+        )
+
+    def test_car_export_filters_by_model(self):
+        """Test the car export streams rows matching the search"""
+        response = self.client.get(reverse("taxi:car-export") + "?model=cam")
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        content = b"".join(response.streaming_content).decode()
+        self.assertEqual(
+            content.splitlines(),
+            ["id,model,manufacturer", f"{self.car1.pk},Camry,Toyota"]
+        )
+
+    def test_driver_export(self):
+        """Test the driver export includes license numbers"""
+        response = self.client.get(
+            reverse("taxi:driver-export") + "?username=test"
+        )
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn(f"{self.user.pk},testuser,,,TEST123", content)
+
+    def test_export_login_required(self):
+        """Test exports redirect anonymous users to login"""
+        self.client.logout()
+        response = self.client.get(reverse("taxi:car-export"))
+        self.assertEqual(response.status_code, 302)
+
+
+class DriverLookupViewTests(TestCase):
+    """Test the driver picker lookup endpoint"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.client.force_login(self.user)
+        for number in range(25):
+            get_user_model().objects.create(
+                username=f"driver{number:02}",
+                license_number=f"DRV000{number:02}"
+            )
+
+    def test_lookup_pages_through_matches(self):
+        """Test results are paged with a next cursor"""
+        url = reverse("taxi:driver-lookup")
+        data = self.client.get(url, {"q": "driver"}).json()
+
+        self.assertEqual(len(data["results"]), 20)
+        self.assertTrue(data["results"][0]["text"].startswith("driver00"))
+
+        data = self.client.get(
+            url, {"q": "driver", "cursor": data["next"]}
+        ).json()
+        self.assertEqual(len(data["results"]), 5)
+        self.assertIsNone(data["next"])
+
+    def test_lookup_filters_by_username(self):
+        """Test the lookup only returns matching drivers"""
+        data = self.client.get(
+            reverse("taxi:driver-lookup"), {"q": "test"}
+        ).json()
+        self.assertEqual(
+            data["results"], [{"id": self.user.pk, "text": str(self.user)}]
+        )
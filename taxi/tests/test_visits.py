@@ -0,0 +1,122 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from taxi.models import VisitCount
+from taxi.visits import VisitBuffer, visits
+
+
+@override_settings(TAXI_VISITS_FLUSH_INTERVAL=3600)
+class VisitBufferTests(TestCase):
+    """Test buffered visit counting"""
+
+    def setUp(self):
+        cache.clear()
+        self.buffer = VisitBuffer()
+        self.first, self.second = (
+            get_user_model().objects.create_user(
+                username=f"driver{number}",
+                password="pass123",
+                license_number=f"DRV0000{number}"
+            ).pk
+            for number in (1, 2)
+        )
+
+    def stored(self):
+        return dict(VisitCount.objects.values_list("driver_id", "count"))
+
+    def test_visits_buffered_until_flush(self):
+        """Test visits stay in memory until a flush"""
+        self.assertEqual(self.buffer.record(self.first), 1)
+        self.assertEqual(self.buffer.record(self.first), 2)
+        self.assertEqual(self.stored(), {})
+
+        self.buffer.flush()
+
+        self.assertEqual(self.stored(), {self.first: 2})
+        self.assertEqual(self.buffer.get(self.first), 2)
+
+    @override_settings(TAXI_VISITS_FLUSH_SIZE=3)
+    def test_flush_when_buffer_full(self):
+        """Test the buffer flushes once enough visits are pending"""
+        self.buffer.record(self.first)
+        self.buffer.record(self.second)
+        self.buffer.record(self.first)
+
+        self.assertEqual(self.stored(), {self.first: 2, self.second: 1})
+
+    def test_flushes_add_up(self):
+        """Test each flush adds to the stored totals in one batch"""
+        self.buffer.record(self.first)
+        self.buffer.flush()
+        self.buffer.record(self.first)
+        self.buffer.record(self.second)
+
+        # savepoint, drivers without a row, insert, update, release
+        with self.assertNumQueries(5):
+            self.buffer.flush()
+
+        self.assertEqual(self.stored(), {self.first: 2, self.second: 1})
+
+    def test_totals_survive_the_cache(self):
+        """Test an evicted cache entry does not reset a total"""
+        for _ in range(3):
+            self.buffer.record(self.first)
+        self.buffer.flush()
+        self.assertEqual(self.buffer.get(self.first), 3)
+
+        cache.clear()
+
+        self.assertEqual(self.buffer.get(self.first), 3)
+        self.assertEqual(VisitBuffer().get(self.first), 3)
+
+    def test_deleted_drivers_are_skipped(self):
+        """Test visits of a driver deleted before the flush are dropped"""
+        self.buffer.record(self.first)
+        self.buffer.record(self.second)
+        get_user_model().objects.filter(pk=self.second).delete()
+
+        self.buffer.flush()
+
+        self.assertEqual(self.stored(), {self.first: 1})
+
+
+class IndexVisitsTests(TestCase):
+    """Test the home page visit counter"""
+
+    def setUp(self):
+        # Visits stay in the process-wide buffer, flush them into
+        # the test database rather than at exit.
+        self.addCleanup(visits.flush)
+        cache.clear()
+        self.client = Client()
+        self.user = get_user_model().objects.create_user(
+            username="testuser",
+            password="testpass123",
+            license_number="TEST123"
+        )
+        self.client.force_login(self.user)
+
+    def test_visits_increase(self):
+        """Test each home page hit is counted"""
+        first = self.client.get(reverse("taxi:index")).context["num_visits"]
+        second = self.client.get(reverse("taxi:index")).context["num_visits"]
+        self.assertEqual(second, first + 1)
+
+    def test_index_does_not_write_session(self):
+        """Test the home page does not save the session"""
+        self.client.get(reverse("taxi:index"))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("taxi:index"))
+
+        self.assertFalse(
+            [
+                q for q in queries
+                if q["sql"].startswith(("INSERT", "UPDATE"))
+                and "django_session" in q["sql"]
+            ]
+        )
@@ -0,0 +1,38 @@
+"""
+Count the thread hops of async code.
+
+Every sync_to_async call runs its function on a worker thread and
+every async_to_sync call blocks a thread on the event loop, so a
+request path without either is thread-free.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from unittest import mock
+
+from asgiref.sync import AsyncToSync, SyncToAsync
+
+
+def describe(func):
+    func = getattr(func, "__func__", func)
+    return f"{func.__module__}.{getattr(func, '__qualname__', func)}"
+
+
+@contextmanager
+def count_thread_hops():
+    """Yield a Counter of the functions called through sync_to_async."""
+    hops = Counter()
+    sync_to_async = SyncToAsync.__call__
+    async_to_sync = AsyncToSync.__call__
+
+    async def counted_sync_to_async(self, *args, **kwargs):
+        hops[describe(self.func)] += 1
+        return await sync_to_async(self, *args, **kwargs)
+
+    def counted_async_to_sync(self, *args, **kwargs):
+        hops[f"async_to_sync {describe(self.awaitable)}"] += 1
+        return async_to_sync(self, *args, **kwargs)
+
+    with mock.patch.object(
+        SyncToAsync, "__call__", counted_sync_to_async
+    ), mock.patch.object(AsyncToSync, "__call__", counted_async_to_sync):
+        yield hops
@@ -0,0 +1,355 @@
+"""
+Streaming bulk import and export of the fleet as CSV or JSON lines.
+
+Rows are read and written in batches, so memory use does not depend
+on the file size. Imports resolve manufacturer names and driver
+usernames with one query per batch and insert with `bulk_create`,
+including the Car.drivers through table rows. Cars keep the id they
+were exported with, so exported assignments import after them.
+Malformed rows are reported in the ImportResult and skipped.
+"""
+import csv
+import json
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from . import counters, versions
+from .models import Car, Driver, Manufacturer
+from .seed import batched
+
+
+Assignment = Car.drivers.through
+
+FIELDS = {
+    "manufacturers": ["name", "country"],
+    "cars": ["id", "model", "manufacturer", "drivers"],
+    "assignments": ["car", "driver"],
+}
+REQUIRED = {
+    "manufacturers": ["name"],
+    "cars": ["model", "manufacturer"],
+    "assignments": ["car", "driver"],
+}
+# Columns holding ids, and text columns with the model field that
+# bounds their length.
+ID_COLUMNS = {
+    "manufacturers": [],
+    "cars": ["id"],
+    "assignments": ["car"],
+}
+TEXT_COLUMNS = {
+    "manufacturers": {
+        "name": (Manufacturer, "name"),
+        "country": (Manufacturer, "country"),
+    },
+    "cars": {
+        "model": (Car, "model"),
+        "manufacturer": (Manufacturer, "name"),
+        "drivers": (Driver, "username"),
+    },
+    "assignments": {"driver": (Driver, "username")},
+}
+FORMATS = ["csv", "jsonl"]
+
+
+def read_rows(stream, fmt):
+    """Yield rows as dicts, None for a line that is not a JSON object."""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip():
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield row if isinstance(row, dict) else None
+
+
+def split_usernames(value):
+    """Drivers are a list in JSON lines and space separated in CSV."""
+    if isinstance(value, list):
+        return value
+    return (value or "").split()
+
+
+def parse_id(value):
+    """Return an id given as a number or a string of digits, or None."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if not isinstance(value, str):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.errors.append(f"row {line}: {message}")
+
+
+def import_rows(kind, stream, fmt, batch_size=5000):
+    """Import manufacturers, cars or assignments and return the result."""
+    importer = {
+        "manufacturers": import_manufacturers,
+        "cars": import_cars,
+        "assignments": import_assignments,
+    }[kind]
+    result = ImportResult()
+
+    rows = enumerate(read_rows(stream, fmt), start=1)
+    for batch in batched(rows, batch_size):
+        batch = valid_rows(kind, batch, result)
+        with transaction.atomic():
+            importer(batch, result)
+
+    # bulk_create sends no signals, so the cached counts are stale.
+    counters.reconcile()
+    return result
+
+
+def valid_rows(kind, batch, result):
+    """Report the rows `clean_row` rejects, return the others cleaned."""
+    valid = []
+    for line, row in batch:
+        try:
+            valid.append((line, clean_row(kind, row)))
+        except ValueError as error:
+            result.error(line, str(error))
+    return valid
+
+
+def clean_row(kind, row):
+    """
+    Return a copy of row with ids as int and drivers as a list, or
+    raise ValueError: the row is malformed, misses a required field,
+    or a value has the wrong type or does not fit its column.
+    """
+    if row is None:
+        raise ValueError("malformed row")
+    missing = [
+        field for field in REQUIRED[kind] if row.get(field) in (None, "")
+    ]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+
+    row = dict(row)
+    for column in ID_COLUMNS[kind]:
+        if row.get(column) in (None, ""):
+            row[column] = None
+        elif parse_id(row[column]) is None:
+            raise ValueError(f"invalid {column} {row[column]}")
+        else:
+            row[column] = parse_id(row[column])
+
+    for column, (model, name) in TEXT_COLUMNS[kind].items():
+        value = row.get(column)
+        if value is None:
+            continue
+        if column == "drivers":
+            if not isinstance(value, (list, str)):
+                raise ValueError(f"invalid {column}")
+            values = row[column] = split_usernames(value)
+        else:
+            values = [value]
+        max_length = model._meta.get_field(name).max_length
+        for text in values:
+            if not isinstance(text, str):
+                raise ValueError(f"invalid {column}")
+            if len(text) > max_length:
+                raise ValueError(
+                    f"{column} longer than {max_length} characters"
+                )
+    return row
+
+
+def import_manufacturers(batch, result):
+    """Create manufacturers, skipping names that already exist."""
+    existing = resolve(Manufacturer, "name", (row["name"] for _, row in batch))
+    manufacturers = {}
+    for _, row in batch:
+        if row["name"] not in existing:
+            manufacturers[row["name"]] = Manufacturer(
+                name=row["name"], country=row.get("country") or ""
+            )
+
+    Manufacturer.objects.bulk_create(
+        manufacturers.values(), ignore_conflicts=True
+    )
+    result.imported += len(manufacturers)
+    versions.bump("manufacturers")
+
+
+def resolve(model, field, values):
+    """Map values of a unique field to primary keys in one query."""
+    return dict(
+        model.objects.filter(**{f"{field}__in": set(values)}).values_list(
+            field, "pk"
+        )
+    )
+
+
+def import_cars(batch, result):
+    """
+    Create cars with their drivers. Cars with an id keep it, ids that
+    already exist are skipped.
+    """
+    manufacturer_ids = resolve(
+        Manufacturer, "name", (row["manufacturer"] for _, row in batch)
+    )
+    driver_ids = resolve(
+        Driver,
+        "username",
+        (
+            username
+            for _, row in batch
+            for username in row.get("drivers") or []
+        ),
+    )
+    existing = set(
+        Car.objects.filter(
+            pk__in={row["id"] for _, row in batch}
+        ).values_list("pk", flat=True)
+    )
+
+    cars = []
+    usernames = []
+    for line, row in batch:
+        pk = row["id"]
+        if row["manufacturer"] not in manufacturer_ids:
+            result.error(line, f"unknown manufacturer {row['manufacturer']}")
+            continue
+        if pk is not None:
+            if pk in existing:
+                continue
+            existing.add(pk)
+        cars.append(
+            Car(
+                pk=pk,
+                model=row["model"],
+                manufacturer_id=manufacturer_ids[row["manufacturer"]],
+            )
+        )
+        usernames.append((line, row.get("drivers") or []))
+
+    kept_ids = any(car.pk is not None for car in cars)
+    Car.objects.bulk_create(cars)
+    result.imported += len(cars)
+    if kept_ids:
+        # Inserting ids does not advance the id sequence of PostgreSQL.
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Car]):
+                cursor.execute(sql)
+
+    links = []
+    for car, (line, names) in zip(cars, usernames):
+        for username in names:
+            if username in driver_ids:
+                links.append(
+                    Assignment(car_id=car.pk, driver_id=driver_ids[username])
+                )
+            else:
+                result.error(line, f"unknown driver {username}")
+
+    Assignment.objects.bulk_create(links, ignore_conflicts=True)
+    versions.bump("cars", "assignments")
+    versions.bump_drivers({link.driver_id for link in links})
+
+
+def import_assignments(batch, result):
+    """Assign drivers to cars, existing assignments are kept as they are."""
+    car_ids = set(
+        Car.objects.filter(
+            pk__in={row["car"] for _, row in batch}
+        ).values_list("pk", flat=True)
+    )
+    driver_ids = resolve(
+        Driver, "username", (row["driver"] for _, row in batch)
+    )
+
+    links = []
+    for line, row in batch:
+        if row["car"] not in car_ids:
+            result.error(line, f"unknown car {row['car']}")
+        elif row["driver"] not in driver_ids:
+            result.error(line, f"unknown driver {row['driver']}")
+        else:
+            links.append(
+                Assignment(
+                    car_id=row["car"],
+                    driver_id=driver_ids[row["driver"]],
+                )
+            )
+
+    Assignment.objects.bulk_create(links, ignore_conflicts=True)
+    result.imported += len(links)
+    versions.bump("assignments")
+    versions.bump_cars({link.car_id for link in links})
+    versions.bump_drivers({link.driver_id for link in links})
+
+
+def export_rows(kind, batch_size=5000):
+    """Yield dicts of manufacturers, cars or assignments in id order."""
+    if kind == "manufacturers":
+        rows = (
+            Manufacturer.objects.order_by("id")
+            .values_list("name", "country")
+            .iterator(chunk_size=batch_size)
+        )
+        for name, country in rows:
+            yield {"name": name, "country": country}
+
+    elif kind == "cars":
+        rows = (
+            Car.objects.order_by("id")
+            .values_list("id", "model", "manufacturer__name")
+            .iterator(chunk_size=batch_size)
+        )
+        for batch in batched(rows, batch_size):
+            drivers = {}
+            links = (
+                Assignment.objects.filter(
+                    car_id__in=[pk for pk, _, _ in batch]
+                )
+                .order_by("driver_id")
+                .values_list("car_id", "driver__username")
+            )
+            for car_id, username in links:
+                drivers.setdefault(car_id, []).append(username)
+
+            for pk, model, manufacturer in batch:
+                yield {
+                    "id": pk,
+                    "model": model,
+                    "manufacturer": manufacturer,
+                    "drivers": drivers.get(pk, []),
+                }
+
+    else:
+        rows = (
+            Assignment.objects.order_by("car_id", "driver_id")
+            .values_list("car_id", "driver__username")
+            .iterator(chunk_size=batch_size)
+        )
+        for car_id, username in rows:
+            yield {"car": car_id, "driver": username}
+
+
+def write_rows(kind, rows, stream, fmt):
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=FIELDS[kind])
+        writer.writeheader()
+        for row in rows:
+            if "drivers" in row:
+                row["drivers"] = " ".join(row["drivers"])
+            writer.writerow(row)
+    else:
+        for row in rows:
+            stream.write(json.dumps(row) + "\n")
@@ -1,14 +1,18 @@
 from django.urls import path
 
+from . import async_views
+from .api import resource_detail, resource_list
 from .views import (
     index,
     CarListView,
     CarDetailView,
+    car_drivers,
     CarCreateView,
     CarUpdateView,
     CarDeleteView,
     DriverListView,
     DriverDetailView,
+    driver_cars,
     DriverCreateView,
     DriverLicenseUpdateView,
     DriverDeleteView,
@@ -17,6 +21,10 @@ from .views import (
     ManufacturerUpdateView,
     ManufacturerDeleteView,
     toggle_assign_to_car,
+    batch_assign_drivers,
+    car_export,
+    driver_export,
+    driver_lookup,
 )
 
 urlpatterns = [
@@ -42,7 +50,9 @@ urlpatterns = [
         name="manufacturer-delete",
     ),
     path("cars/", CarListView.as_view(), name="car-list"),
+    path("cars/export/", car_export, name="car-export"),
     path("cars/<int:pk>/", CarDetailView.as_view(), name="car-detail"),
+    path("cars/<int:pk>/drivers/", car_drivers, name="car-drivers"),
     path("cars/create/", CarCreateView.as_view(), name="car-create"),
     path("cars/<int:pk>/update/", CarUpdateView.as_view(), name="car-update"),
     path("cars/<int:pk>/delete/", CarDeleteView.as_view(), name="car-delete"),
@@ -51,14 +61,22 @@ urlpatterns = [
         toggle_assign_to_car,
         name="toggle-car-assign",
     ),
+    path(
+        "cars/assignments/",
+        batch_assign_drivers,
+        name="car-assignments",
+    ),
     path("drivers/", DriverListView.as_view(), name="driver-list"),
     path(
         "drivers/<int:pk>/", DriverDetailView.as_view(), name="driver-detail"
     ),
+    path("drivers/<int:pk>/cars/", driver_cars, name="driver-cars"),
     path("drivers/", DriverListView.as_view(), name="driver-list"),
     path(
         "drivers/<int:pk>/", DriverDetailView.as_view(), name="driver-detail"
     ),
+    path("drivers/export/", driver_export, name="driver-export"),
+    path("drivers/lookup/", driver_lookup, name="driver-lookup"),
     path("drivers/create/", DriverCreateView.as_view(), name="driver-create"),
     path(
         "drivers/<int:pk>/update/",
@@ -72,4 +90,49 @@ urlpatterns = [
     ),
 ]
 
+# Async variants of the read-heavy pages, for ASGI deployments.
+urlpatterns += [
+    path(
+        "async/manufacturers/",
+        async_views.manufacturer_list,
+        name="async-manufacturer-list",
+    ),
+    path("async/cars/", async_views.car_list, name="async-car-list"),
+    path(
+        "async/cars/<int:pk>/",
+        async_views.car_detail,
+        name="async-car-detail",
+    ),
+    path("async/drivers/", async_views.driver_list, name="async-driver-list"),
+    path(
+        "async/drivers/<int:pk>/",
+        async_views.driver_detail,
+        name="async-driver-detail",
+    ),
+]
+
+API_RESOURCES = [
+    ("manufacturers", "manufacturer"),
+    ("cars", "car"),
+    ("drivers", "driver"),
+]
+
+urlpatterns += [
+    path(
+        f"api/v1/{resource}/",
+        resource_list,
+        {"resource": resource},
+        name=f"api-{name}-list",
+    )
+    for resource, name in API_RESOURCES
+] + [
+    path(
+        f"api/v1/{resource}/<int:pk>/",
+        resource_detail,
+        {"resource": resource},
+        name=f"api-{name}-detail",
+    )
+    for resource, name in API_RESOURCES
+]
+
 app_name = "taxi"
@@ -0,0 +1,88 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .routing import read_from_primary, replicas, sticky_seconds
+
+
+KEY_PREFIX = "taxi:version:"
+# Set on a bump for TAXI_PRIMARY_STICKY_SECONDS, while the replicas may
+# not have the change yet. Holds the time of the bump.
+BUMPED_PREFIX = "taxi:bumped:"
+
+# Table versions, bumped on any change to the rows of the table.
+# Object versions are named "car:<pk>" and "driver:<pk>".
+TABLES = ("manufacturers", "cars", "drivers", "assignments")
+
+
+def new_version():
+    """
+    Versions start from the clock, so a version created after a bump
+    never matches one an old cache entry was stored under.
+    """
+    return time.time_ns() // 1000
+
+
+def get_versions(*names):
+    """
+    Return the current version of every name, creating missing ones.
+
+    While a name was bumped recently, the rest of the request reads
+    from the primary: pages and fragments rendered now are cached
+    under the version, a lagging replica would fill them with old rows.
+    """
+    keys = [KEY_PREFIX + name for name in names]
+    bumped = [BUMPED_PREFIX + name for name in names] if replicas() else []
+    versions = cache.get_many(keys + bumped)
+    if any(key in versions for key in bumped):
+        read_from_primary()
+    missing = {key: new_version() for key in keys if key not in versions}
+
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+
+    return [versions[key] for key in keys]
+
+
+def version_token(*names):
+    return "-".join(str(version) for version in get_versions(*names))
+
+
+def recently_bumped(*names):
+    """Whether replicas may still lack a change to any of names."""
+    if not replicas():
+        return False
+    return bool(cache.get_many([BUMPED_PREFIX + name for name in names]))
+
+
+def bump(*names):
+    """
+    Move names to a new version by dropping the current one, now and
+    again once the transaction commits, so a reader that cached the
+    old rows before the commit is invalidated as well.
+    """
+    keys = [KEY_PREFIX + name for name in names]
+    if not keys:
+        return
+
+    def drop():
+        cache.delete_many(keys)
+        if replicas():
+            # The replicas' lag counts from the commit.
+            cache.set_many(
+                {BUMPED_PREFIX + name: time.time() for name in names},
+                sticky_seconds(),
+            )
+
+    drop()
+    transaction.on_commit(drop)
+
+
+def bump_cars(car_ids):
+    bump(*(f"car:{pk}" for pk in car_ids))
+
+
+def bump_drivers(driver_ids):
+    bump(*(f"driver:{pk}" for pk in driver_ids))
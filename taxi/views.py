@@ -1,48 +1,77 @@
+import csv
+import json
+from itertools import chain
+
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseRedirect
-from django.shortcuts import render
+from django.db.models import Exists, OuterRef
+from django.http import (
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404, render
 from django.urls import reverse_lazy
+from django.utils.functional import SimpleLazyObject
 from django.views import generic
+from django.views.decorators.http import require_POST
 
 from django.contrib.auth.mixins import LoginRequiredMixin
 
+from .assignments import apply_operations, toggle_assignment
+from .conditional import ConditionalGetMixin
+from .counters import get_counts
 from .models import Driver, Car, Manufacturer
 from .forms import DriverCreationForm, DriverLicenseUpdateForm, CarForm
+from .fragments import FragmentCacheMixin
+from .pagination import CursorPaginationMixin, paginate_by_cursor
+from .routing import use_primary
+from .search import get_search_backend
+from .visits import visits
+
+
+EXPORT_CHUNK_SIZE = 2000
+LOOKUP_PAGE_SIZE = 20
+CAR_DRIVERS_PAGE_SIZE = 20
+DRIVER_CARS_PAGE_SIZE = 20
+MAX_ASSIGNMENT_OPERATIONS = 10000
 
 
 @login_required
 def index(request):
     """View function for the home page of the site."""
 
-    num_drivers = Driver.objects.count()
-    num_cars = Car.objects.count()
-    num_manufacturers = Manufacturer.objects.count()
+    counts = get_counts("drivers", "cars", "manufacturers")
 
-    num_visits = request.session.get("num_visits", 0)
-    request.session["num_visits"] = num_visits + 1
+    num_visits = visits.record(request.user.pk)
 
     context = {
-        "num_drivers": num_drivers,
-        "num_cars": num_cars,
-        "num_manufacturers": num_manufacturers,
-        "num_visits": num_visits + 1,
+        "num_drivers": counts["drivers"],
+        "num_cars": counts["cars"],
+        "num_manufacturers": counts["manufacturers"],
+        "num_visits": num_visits,
     }
 
     return render(request, "taxi/index.html", context=context)
 
 
-class ManufacturerListView(generic.ListView):
+class ManufacturerListView(
+    ConditionalGetMixin, CursorPaginationMixin, generic.ListView
+):
     model = Manufacturer
     context_object_name = "manufacturer_list"
     template_name = "taxi/manufacturer_list.html"
     paginate_by = 5
+    cursor_ordering = ("name", "id")
+    version_names = ("manufacturers",)
 
     def get_queryset(self):
         queryset = Manufacturer.objects.all()
         name = self.request.GET.get("name")
 
         if name:
-            queryset = queryset.filter(name__icontains=name)
+            queryset = get_search_backend().filter(
+                queryset, "name", name
+            )
 
         return queryset
 
@@ -70,18 +99,23 @@ class ManufacturerDeleteView(generic.DeleteView):
     success_url = reverse_lazy("taxi:manufacturer-list")
 
 
-class CarListView(generic.ListView):
+class CarListView(
+    ConditionalGetMixin, CursorPaginationMixin, generic.ListView
+):
     model = Car
     paginate_by = 5
     context_object_name = "car_list"
     template_name = "taxi/car_list.html"
+    version_names = ("cars", "manufacturers")
 
     def get_queryset(self):
         queryset = Car.objects.select_related("manufacturer").order_by("id")
         model = self.request.GET.get("model")
 
         if model:
-            queryset = queryset.filter(model__icontains=model)
+            queryset = get_search_backend().filter(
+                queryset, "model", model
+            )
 
         return queryset
 
@@ -92,9 +126,63 @@ class CarListView(generic.ListView):
         return context
 
 
-class CarDetailView(generic.DetailView):
+class CarDetailView(
+    ConditionalGetMixin, FragmentCacheMixin, generic.DetailView
+):
     model = Car
 
+    def get_version_names(self):
+        return [f"car:{self.kwargs['pk']}", "manufacturers"]
+
+    def get_queryset(self):
+        return car_detail_queryset(self.request.user.pk)
+
+    def get_fragment_versions(self):
+        return [f"car:{self.object.pk}"]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Lazy, only evaluated when the cached fragment is missing.
+        # The rest of the drivers are loaded page by page from
+        # car_drivers.
+        context["drivers"] = SimpleLazyObject(
+            lambda: car_drivers_page(self.object)
+        )
+        context["driver_count"] = SimpleLazyObject(
+            Car.drivers.through.objects.filter(car_id=self.object.pk).count
+        )
+        return context
+
+
+def car_detail_queryset(driver_id):
+    return Car.objects.select_related("manufacturer").annotate(
+        is_assigned=Exists(
+            Car.drivers.through.objects.filter(
+                car_id=OuterRef("pk"), driver_id=driver_id
+            )
+        )
+    )
+
+
+def car_drivers_queryset(car):
+    return car.drivers.only("id", "username", "first_name", "last_name")
+
+
+def car_drivers_page(car, cursor=None):
+    return paginate_by_cursor(
+        car_drivers_queryset(car), ("id",), CAR_DRIVERS_PAGE_SIZE, cursor
+    )
+
+
+def car_drivers(request, pk):
+    """A page of a car's drivers as list items, for car detail."""
+    car = get_object_or_404(Car.objects.only("id"), pk=pk)
+    return render(
+        request,
+        "taxi/car_driver_items.html",
+        {"car": car, "page": car_drivers_page(car, request.GET.get("cursor"))},
+    )
+
 
 class CarCreateView(generic.CreateView):
     model = Car
@@ -113,18 +201,26 @@ class CarDeleteView(generic.DeleteView):
     success_url = reverse_lazy("taxi:car-list")
 
 
-class DriverListView(LoginRequiredMixin, generic.ListView):
+class DriverListView(
+    LoginRequiredMixin,
+    ConditionalGetMixin,
+    CursorPaginationMixin,
+    generic.ListView,
+):
     model = Driver
     paginate_by = 5
     context_object_name = "driver_list"
     template_name = "taxi/driver_list.html"
+    version_names = ("drivers",)
 
     def get_queryset(self):
         queryset = Driver.objects.all().order_by("id")
         username = self.request.GET.get("username")
 
         if username:
-            queryset = queryset.filter(username__icontains=username)
+            queryset = get_search_backend().filter(
+                queryset, "username", username
+            )
 
         return queryset
 
@@ -135,9 +231,55 @@ class DriverListView(LoginRequiredMixin, generic.ListView):
         return context
 
 
-class DriverDetailView(generic.DetailView):
+class DriverDetailView(
+    ConditionalGetMixin, FragmentCacheMixin, generic.DetailView
+):
     model = Driver
-    queryset = Driver.objects.all().prefetch_related("cars__manufacturer")
+
+    def get_version_names(self):
+        return [f"driver:{self.kwargs['pk']}", "manufacturers"]
+
+    def get_fragment_versions(self):
+        return [f"driver:{self.object.pk}", "manufacturers"]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Lazy, only evaluated when the cached fragment is missing.
+        # The rest of the cars are loaded page by page from driver_cars.
+        context["cars"] = SimpleLazyObject(
+            lambda: driver_cars_page(self.object)
+        )
+        context["car_count"] = SimpleLazyObject(
+            Car.drivers.through.objects.filter(
+                driver_id=self.object.pk
+            ).count
+        )
+        return context
+
+
+def driver_cars_queryset(driver):
+    return driver.cars.select_related("manufacturer").only(
+        "id", "model", "manufacturer__name"
+    )
+
+
+def driver_cars_page(driver, cursor=None):
+    return paginate_by_cursor(
+        driver_cars_queryset(driver), ("id",), DRIVER_CARS_PAGE_SIZE, cursor
+    )
+
+
+def driver_cars(request, pk):
+    """A page of a driver's cars as list items, for driver detail."""
+    driver = get_object_or_404(Driver.objects.only("id"), pk=pk)
+    return render(
+        request,
+        "taxi/driver_car_items.html",
+        {
+            "driver": driver,
+            "page": driver_cars_page(driver, request.GET.get("cursor")),
+        },
+    )
 
 
 class DriverCreateView(generic.CreateView):
@@ -156,13 +298,112 @@ class DriverDeleteView(generic.DeleteView):
     success_url = reverse_lazy("taxi:driver-list")
 
 
+@use_primary
 @login_required
 def toggle_assign_to_car(request, pk):
-    driver = Driver.objects.get(id=request.user.id)
-    if (
-            Car.objects.get(id=pk) in driver.cars.all()
-    ):
-        driver.cars.remove(pk)
-    else:
-        driver.cars.add(pk)
+    car = get_object_or_404(Car.objects.only("id"), pk=pk)
+    toggle_assignment(car, request.user.pk)
     return HttpResponseRedirect(reverse_lazy("taxi:car-detail", args=[pk]))
+
+
+@require_POST
+@login_required
+def batch_assign_drivers(request):
+    """
+    Add and remove many car-driver assignments in one transaction.
+
+    Expects a JSON body {"operations": [{"op": "add", "car": 1,
+    "driver": 2}, ...]} and answers with one result per operation.
+    """
+    try:
+        operations = json.loads(request.body)["operations"]
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse(
+            {"error": "Expected a JSON object with an operations list"},
+            status=400,
+        )
+
+    if not isinstance(operations, list):
+        return JsonResponse({"error": "operations must be a list"}, status=400)
+    if len(operations) > MAX_ASSIGNMENT_OPERATIONS:
+        return JsonResponse(
+            {
+                "error": f"At most {MAX_ASSIGNMENT_OPERATIONS} operations "
+                "per request"
+            },
+            status=400,
+        )
+
+    return JsonResponse({"results": apply_operations(operations)})
+
+
+class Echo:
+    """File-like object handing back what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(filename, header, rows):
+    writer = csv.writer(Echo())
+    return StreamingHttpResponse(
+        chain([writer.writerow(header)], map(writer.writerow, rows)),
+        content_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@login_required
+def car_export(request):
+    queryset = Car.objects.order_by("id")
+    model = request.GET.get("model")
+
+    if model:
+        queryset = get_search_backend().filter(queryset, "model", model)
+
+    rows = queryset.values_list(
+        "id", "model", "manufacturer__name"
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return stream_csv("cars.csv", ["id", "model", "manufacturer"], rows)
+
+
+@login_required
+def driver_export(request):
+    queryset = Driver.objects.order_by("id")
+    username = request.GET.get("username")
+
+    if username:
+        queryset = get_search_backend().filter(queryset, "username", username)
+
+    rows = queryset.values_list(
+        "id", "username", "first_name", "last_name", "license_number"
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return stream_csv(
+        "drivers.csv",
+        ["id", "username", "first_name", "last_name", "license_number"],
+        rows,
+    )
+
+
+@login_required
+def driver_lookup(request):
+    """JSON search over drivers for the CarForm driver picker."""
+    queryset = Driver.objects.only(
+        "id", "username", "first_name", "last_name"
+    )
+    term = request.GET.get("q")
+
+    if term:
+        queryset = get_search_backend().filter(queryset, "username", term)
+
+    page = paginate_by_cursor(
+        queryset, ("id",), LOOKUP_PAGE_SIZE, request.GET.get("cursor")
+    )
+    return JsonResponse(
+        {
+            "results": [
+                {"id": driver.pk, "text": str(driver)} for driver in page
+            ],
+            "next": page.next_cursor,
+        }
+    )
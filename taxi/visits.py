@@ -0,0 +1,106 @@
+import atexit
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from .models import Driver, VisitCount
+
+
+KEY_PREFIX = "taxi:visits:"
+
+
+class VisitBuffer:
+    """
+    Per-process buffer of home page visits.
+
+    Visits are added up in memory and flushed to the VisitCount table
+    in one batch once TAXI_VISITS_FLUSH_SIZE visits are pending or
+    TAXI_VISITS_FLUSH_INTERVAL seconds have passed since the last
+    flush. Stored totals are cached for TAXI_VISITS_CACHE_TIMEOUT
+    seconds. Reads add this process's pending visits to the stored
+    total, so other workers' unflushed visits are not counted yet.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._pending_total = 0
+        self._flushed_at = time.monotonic()
+
+    def record(self, user_id):
+        """Count one visit of user_id and return their approximate total."""
+        flush_size = getattr(settings, "TAXI_VISITS_FLUSH_SIZE", 100)
+        interval = getattr(settings, "TAXI_VISITS_FLUSH_INTERVAL", 10)
+
+        with self._lock:
+            self._pending[user_id] = self._pending.get(user_id, 0) + 1
+            self._pending_total += 1
+            due = (
+                self._pending_total >= flush_size
+                or time.monotonic() - self._flushed_at >= interval
+            )
+
+        if due:
+            self.flush()
+
+        return self.get(user_id)
+
+    def get(self, user_id):
+        return self.stored(user_id) + self._pending.get(user_id, 0)
+
+    def stored(self, user_id):
+        """Flushed visits of user_id, read through the cache."""
+        key = KEY_PREFIX + str(user_id)
+        total = cache.get(key)
+        if total is None:
+            total = (
+                VisitCount.objects.filter(driver_id=user_id)
+                .values_list("count", flat=True)
+                .first()
+            ) or 0
+            cache.set(
+                key,
+                total,
+                getattr(settings, "TAXI_VISITS_CACHE_TIMEOUT", 60),
+            )
+        return total
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._pending_total = 0
+            self._flushed_at = time.monotonic()
+
+        if not pending:
+            return
+
+        with transaction.atomic():
+            # Drivers deleted since their visit are left out.
+            VisitCount.objects.bulk_create(
+                (
+                    VisitCount(driver_id=pk)
+                    for pk in Driver.objects.filter(
+                        pk__in=pending, visit_count__isnull=True
+                    ).values_list("pk", flat=True)
+                ),
+                ignore_conflicts=True,
+            )
+            VisitCount.objects.filter(driver_id__in=pending).update(
+                count=F("count")
+                + Case(
+                    *(
+                        When(driver_id=pk, then=Value(count))
+                        for pk, count in pending.items()
+                    ),
+                    default=Value(0),
+                )
+            )
+        cache.delete_many([KEY_PREFIX + str(pk) for pk in pending])
+
+
+visits = VisitBuffer()
+atexit.register(visits.flush)
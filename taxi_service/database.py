@@ -0,0 +1,89 @@
+"""
+Database and cache settings from URLs, for settings_prod.
+
+    postgres://taxi:secret@db:5432/taxi?sslmode=require
+    sqlite:////srv/taxi/db.sqlite3      (absolute path)
+    sqlite:///db.sqlite3                (relative to the working dir)
+    redis://cache:6379/0
+"""
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+POSTGRES_SCHEMES = {"postgres", "postgresql"}
+
+# WAL lets readers run while a write is in progress. IMMEDIATE takes
+# the write lock at BEGIN, so two writers queue on the busy timeout
+# instead of one failing when it upgrades a read lock mid-transaction.
+SQLITE_OPTIONS = {
+    "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL",
+    "transaction_mode": "IMMEDIATE",
+    "timeout": 20,
+}
+
+
+def database_from_url(url, conn_max_age=60, pool_size=None):
+    """
+    Return a DATABASES entry for url.
+
+    Connections are kept open for `conn_max_age` seconds and checked
+    before reuse. With `pool_size` a PostgreSQL connection pool of up
+    to that many connections is used instead, which Django does not
+    allow together with persistent connections.
+    """
+    parts = urlsplit(url)
+
+    if parts.scheme == "sqlite":
+        return {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": parts.path[1:] or ":memory:",
+            "CONN_MAX_AGE": conn_max_age,
+            "OPTIONS": dict(SQLITE_OPTIONS),
+        }
+
+    if parts.scheme not in POSTGRES_SCHEMES:
+        raise ImproperlyConfigured(
+            f"Unsupported DATABASE_URL scheme {parts.scheme!r}"
+        )
+
+    options = dict(parse_qsl(parts.query))
+    if pool_size:
+        options["pool"] = {"min_size": 1, "max_size": pool_size}
+        conn_max_age = 0
+
+    return {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": unquote(parts.path[1:]),
+        "USER": unquote(parts.username or ""),
+        "PASSWORD": unquote(parts.password or ""),
+        "HOST": parts.hostname or "",
+        "PORT": str(parts.port or ""),
+        "CONN_MAX_AGE": conn_max_age,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": options,
+    }
+
+
+def cache_from_url(url, workers=1):
+    """
+    Return a CACHES entry, a shared Redis cache for redis:// urls.
+    Both backends count hits and misses for taxi.metrics.
+
+    Without a url each of the `workers` processes gets a cache of its
+    own, in which page versions never expire, so a change made through
+    one worker would never reach the others.
+    """
+    if not url:
+        if workers > 1:
+            raise ImproperlyConfigured(
+                f"CACHE_URL is required with {workers} workers: page "
+                "versions and counters must live in a shared cache"
+            )
+        return {"BACKEND": "taxi.metrics.MeteredLocMemCache"}
+    if urlsplit(url).scheme not in ("redis", "rediss"):
+        raise ImproperlyConfigured("CACHE_URL must be a redis:// url")
+    return {
+        "BACKEND": "taxi.metrics.MeteredRedisCache",
+        "LOCATION": url,
+    }
@@ -49,7 +49,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "taxi.instrumentation.InstrumentationMiddleware",
+    "taxi.querystats.QueryStatsMiddleware",
+    "taxi.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "taxi.routing.ReplicaRoutingMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -92,6 +96,30 @@ DATABASES = {
     }
 }
 
+# Counts hits and misses for /metrics, see taxi.metrics.
+CACHES = {"default": {"BACKEND": "taxi.metrics.MeteredLocMemCache"}}
+
+# Reads of GET requests go to one of these aliases, see taxi.routing.
+DATABASE_ROUTERS = ["taxi.routing.ReplicaRouter"]
+
+TAXI_READ_REPLICAS = []
+
+# Page the car, driver and manufacturer lists with ?cursor= tokens
+# instead of page numbers, see taxi.pagination.
+TAXI_CURSOR_PAGINATION = False
+
+# Share of requests reported by taxi.instrumentation, the debug
+# toolbar covers local development.
+TAXI_INSTRUMENTATION_SAMPLE_RATE = 0
+
+# Directory of the per-process query statistics of taxi.querystats,
+# None turns them off.
+TAXI_QUERY_STATS_DIR = None
+
+# Directory where each process writes its taxi.metrics registry, so
+# /metrics reports all processes. None reports the scraped one only.
+TAXI_METRICS_DIR = None
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -0,0 +1,102 @@
+"""
+Production settings, configured from the environment.
+
+    DJANGO_SETTINGS_MODULE=taxi_service.settings_prod
+    SECRET_KEY         required
+    ALLOWED_HOSTS      comma separated host names
+    DATABASE_URL       postgres://... or sqlite:///..., see database.py
+    DB_CONN_MAX_AGE    seconds to keep connections open, default 60
+    DB_POOL_SIZE       use a psycopg pool of this size on PostgreSQL
+    DATABASE_REPLICA_URLS
+                       comma separated read replicas, see taxi.routing
+    CACHE_URL          redis://..., needed with more than one process:
+                       counters and page versions live in the cache
+    WEB_CONCURRENCY    worker processes, as read by gunicorn and
+                       uvicorn, default 1; more need CACHE_URL
+    TAXI_CURSOR_PAGINATION
+                       1 pages the lists by cursor instead of number
+    TAXI_INSTRUMENTATION_SAMPLE_RATE
+                       share of requests logged with timings, 0.01
+    TAXI_QUERY_STATS_DIR
+                       where processes write query statistics for
+                       `manage.py query_stats`, empty turns them off
+    TAXI_SLOW_QUERY_MS queries logged as slow, 200
+    TAXI_METRICS_DIR   where processes write their metrics, so /metrics
+                       reports all workers, empty for one process only
+"""
+import os
+
+from taxi_service.settings import *  # noqa: F403
+from taxi_service.settings import BASE_DIR, INSTALLED_APPS, MIDDLEWARE
+from taxi_service.database import cache_from_url, database_from_url
+
+
+DEBUG = False
+
+SECRET_KEY = os.environ["SECRET_KEY"]
+
+ALLOWED_HOSTS = [
+    host for host in os.environ.get("ALLOWED_HOSTS", "").split(",") if host
+]
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != "debug_toolbar"]
+
+MIDDLEWARE = [
+    name for name in MIDDLEWARE if not name.startswith("debug_toolbar")
+]
+
+CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 0))
+
+DATABASES = {
+    "default": database_from_url(
+        os.environ.get(
+            "DATABASE_URL", f"sqlite:///{BASE_DIR / 'db.sqlite3'}"
+        ),
+        conn_max_age=CONN_MAX_AGE,
+        pool_size=POOL_SIZE,
+    )
+}
+
+for number, url in enumerate(
+    filter(None, os.environ.get("DATABASE_REPLICA_URLS", "").split(",")),
+    start=1,
+):
+    DATABASES[f"replica{number}"] = {
+        **database_from_url(
+            url, conn_max_age=CONN_MAX_AGE, pool_size=POOL_SIZE
+        ),
+        # Tests read the rows they wrote through the primary connection.
+        "TEST": {"MIRROR": "default"},
+    }
+
+TAXI_READ_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+
+CACHES = {
+    "default": cache_from_url(
+        os.environ.get("CACHE_URL"),
+        workers=int(os.environ.get("WEB_CONCURRENCY", 1)),
+    )
+}
+
+TAXI_CURSOR_PAGINATION = os.environ.get("TAXI_CURSOR_PAGINATION") == "1"
+
+TAXI_INSTRUMENTATION_SAMPLE_RATE = float(
+    os.environ.get("TAXI_INSTRUMENTATION_SAMPLE_RATE", 0.01)
+)
+
+TAXI_QUERY_STATS_DIR = os.environ.get(
+    "TAXI_QUERY_STATS_DIR", BASE_DIR / "querystats"
+)
+TAXI_METRICS_DIR = os.environ.get("TAXI_METRICS_DIR", BASE_DIR / "metrics")
+TAXI_SLOW_QUERY_MS = float(os.environ.get("TAXI_SLOW_QUERY_MS", 200))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "taxi.instrumentation": {"handlers": ["console"], "level": "INFO"},
+        "taxi.querystats": {"handlers": ["console"], "level": "WARNING"},
+    },
+}